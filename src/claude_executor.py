@@ -1,66 +1,73 @@
 import os
-import subprocess
+import re
+import sys
+import asyncio
 import logging
 import json
-from typing import Optional, Tuple
-from repo_manager import RepositoryManager
+import shutil
+import signal
+import string
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple, Dict
+from repo_manager import RepositoryManager, GIT_BIN
+from github_client import GitHubClient
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-class ClaudeExecutor:
-    def __init__(self, repo_manager: RepositoryManager):
-        self.repo_manager = repo_manager
-        
-    def execute_issue_fix(self, repo_url: str, issue_number: int, issue_title: str, issue_body: str) -> Tuple[bool, str]:
-        """
-        Execute Claude Code to fix an issue using persistent repository:
-        1. Prepare repo for issue (sync and create branch)
-        2. Ask Claude to fix the issue in the repo directory
-        3. Create PR
-        """
-        try:
-            # Prepare repository for this issue
-            prep_success, prep_msg = self.repo_manager.prepare_for_issue(issue_number)
-            if not prep_success:
-                return False, f"Failed to prepare repository: {prep_msg}"
-            
-            logger.info(f"Repository prepared: {prep_msg}")
-            
-            # Get repository directory
-            repo_path = self.repo_manager.get_repo_directory()
-            
-            # Execute Claude Code to fix the issue
-            fix_prompt = self._build_fix_prompt(issue_number, issue_title, issue_body)
-            fix_success, fix_msg = self._run_claude_code(repo_path, fix_prompt)
-            
-            if not fix_success:
-                # Clean up on failure
-                self.repo_manager.cleanup_after_issue(success=False)
-                return False, f"Claude Code execution failed: {fix_msg}"
-            
-            # Create PR
-            branch_name = f"fix-issue-{issue_number}"
-            pr_success, pr_msg = self._create_pr(repo_path, branch_name, issue_number, issue_title)
-            
-            if not pr_success:
-                # Clean up on PR failure
-                self.repo_manager.cleanup_after_issue(success=False)
-                return False, f"Failed to create PR: {pr_msg}"
-            
-            # Clean up on success (but keep the branch since PR was created)
-            self.repo_manager.cleanup_after_issue(success=True)
-            return True, f"Successfully processed issue #{issue_number}. {pr_msg}"
-            
-        except Exception as e:
-            logger.error(f"Error executing issue fix: {e}")
-            # Clean up on exception
-            self.repo_manager.cleanup_after_issue(success=False)
-            return False, str(e)
-    
-    
-    def _build_fix_prompt(self, issue_number: int, issue_title: str, issue_body: str) -> str:
-        """Build intelligent system prompt for Claude Code with comprehensive project analysis"""
-        return f"""You are an expert software engineer working on GitHub issue #{issue_number}: {issue_title}
+# Claude can log heavily on failure; only the tail is useful in error messages
+STDERR_TAIL_BYTES = 64 * 1024
+
+# Upper bound for a single stream-json event line; tool results can be large
+STREAM_LINE_LIMIT = 32 * 1024 * 1024
+
+_json_loads = orjson.loads if orjson else json.loads
+
+# 'git push --porcelain' flags for refs that ended up on the remote: fast-forward, forced, new, up to date
+PUSH_OK_FLAGS = (' ', '+', '*', '=')
+
+# Enhanced system prompt appended to Claude Code's own
+CLAUDE_SYSTEM_PROMPT = """You are an expert software engineer specializing in Next.js, React, and TypeScript. 
+
+Key principles:
+- Always explore and understand the project structure before making changes
+- Follow existing code patterns, naming conventions, and architectural decisions
+- Research best practices when implementing new features
+- Test thoroughly and ensure backward compatibility
+- Write clean, maintainable code with proper error handling
+- Consider accessibility and responsive design for UI changes
+
+Your goal is to deliver production-quality code that seamlessly integrates with the existing project."""
+
+# Resolved once so spawns exec the CLI directly instead of searching PATH each time
+CLAUDE_BIN = shutil.which('claude') or 'claude'
+
+# A successful authentication check is remembered here so warm restarts skip spawning the CLI
+CLAUDE_AUTH_MARKER = Path('data/.claude_auth_ok')
+CLAUDE_AUTH_MARKER_TTL_SECONDS = 3600
+
+# Matches 'auth', 'login' and 'unauthenticated' anywhere in raw error output, in one case-insensitive pass
+AUTH_ERROR_RE = re.compile(rb'auth|login', re.IGNORECASE)
+
+# Claude Code in headless mode with comprehensive permissions for Next.js development.
+# The prompt is fed through stdin rather than argv to keep large issue bodies under ARG_MAX.
+CLAUDE_ARGV = (
+    CLAUDE_BIN,
+    '--print',
+    '--output-format', 'stream-json',
+    '--verbose',
+    '--allowedTools', 'Bash,Read,Edit,Write,MultiEdit,Glob,Grep,WebFetch,WebSearch',
+    '--append-system-prompt', CLAUDE_SYSTEM_PROMPT
+)
+
+# Fix prompt as a single format template; only the issue fields vary per issue
+_FIX_PROMPT_TEMPLATE = """You are an expert software engineer working on GitHub issue #{issue_number}: {issue_title}
 
 ## Issue Details
 {issue_body}
@@ -145,96 +152,324 @@ Before making any changes, thoroughly understand the project:
 - Clean, professional commit
 
 Start by exploring the project structure and understanding the codebase before making any changes. Be methodical, thorough, and professional in your approach."""
-    
-    def _run_claude_code(self, repo_path: str, prompt: str) -> Tuple[bool, str]:
-        """Execute Claude Code using headless SDK"""
+
+def _compile_prompt(template: str) -> Tuple[Tuple[bytes, ...], Tuple[str, ...]]:
+    """Split a format template into UTF-8 literal chunks and the field names filling the gaps between them"""
+    chunks, slots = [], []
+    literal_run = ''  # Escaped braces split one literal across several parse results
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        literal_run += literal
+        if field_name is not None:
+            chunks.append(literal_run.encode())
+            slots.append(field_name)
+            literal_run = ''
+    chunks.append(literal_run.encode())
+    return tuple(chunks), tuple(slots)
+
+# The ~3 KB of fixed prompt text is encoded once; per issue only the fields are encoded
+_PROMPT_CHUNKS, _PROMPT_SLOTS = _compile_prompt(_FIX_PROMPT_TEMPLATE)
+
+@dataclass(slots=True)
+class ClaudeRunResult:
+    """Outcome of a single Claude Code run"""
+    success: bool
+    message: str
+    cost: Optional[float] = None
+
+async def _write_stdin(stream: asyncio.StreamWriter, data: bytes):
+    """Write data to a subprocess's stdin and close it to signal EOF"""
+    try:
+        stream.write(data)
+        await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # The process exited before reading its input; its exit status tells the rest
+        pass
+    finally:
+        stream.close()
+
+async def _read_result_event(stream: asyncio.StreamReader) -> Optional[dict]:
+    """Parse Claude's stream-json events as they arrive, returning the final result event"""
+    result_event = None
+    async for line in stream:
         try:
-            # Create enhanced system prompt
-            system_prompt = """You are an expert software engineer specializing in Next.js, React, and TypeScript. 
+            event = _json_loads(line)
+        except ValueError:
+            continue
+        if not isinstance(event, dict):
+            continue
+        
+        event_type = event.get('type')
+        if event_type == 'result':
+            result_event = event
+        elif event_type == 'assistant' and logger.isEnabledFor(logging.DEBUG):
+            # Surface progress while the run is still going
+            for block in event.get('message', {}).get('content', ()):
+                if isinstance(block, dict) and block.get('type') == 'tool_use':
+                    logger.debug("Claude Code is using %s", block.get('name'))
+    return result_event
 
-Key principles:
-- Always explore and understand the project structure before making changes
-- Follow existing code patterns, naming conventions, and architectural decisions
-- Research best practices when implementing new features
-- Test thoroughly and ensure backward compatibility
-- Write clean, maintainable code with proper error handling
-- Consider accessibility and responsive design for UI changes
+async def _read_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Drain a stream, keeping only its last `limit` bytes"""
+    tail = bytearray()
+    while chunk := await stream.read(65536):
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return bytes(tail)
 
-Your goal is to deliver production-quality code that seamlessly integrates with the existing project."""
+def _is_ref_pushed(porcelain_line: bytes, branch_name: str) -> bool:
+    """Check whether a 'git push --porcelain' status line reports the branch as updated on the remote"""
+    fields = porcelain_line.decode(errors='replace').rstrip('\n').split('\t')
+    return (
+        len(fields) >= 2
+        and fields[0] in PUSH_OK_FLAGS
+        and fields[1].endswith(f':refs/heads/{branch_name}')
+    )
+
+def is_auth_error(output: bytes) -> bool:
+    """Check whether Claude Code's error output points at missing or expired authentication"""
+    return AUTH_ERROR_RE.search(output) is not None
+
+def is_claude_auth_cached() -> bool:
+    """Check whether Claude Code authentication was verified within the marker's TTL"""
+    try:
+        return time.time() - CLAUDE_AUTH_MARKER.stat().st_mtime < CLAUDE_AUTH_MARKER_TTL_SECONDS
+    except OSError:
+        return False
+
+def set_claude_auth_cached(authenticated: bool):
+    """Write or remove the authentication marker"""
+    try:
+        if authenticated:
+            CLAUDE_AUTH_MARKER.parent.mkdir(parents=True, exist_ok=True)
+            CLAUDE_AUTH_MARKER.write_text(str(time.time()))
+        else:
+            CLAUDE_AUTH_MARKER.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not update Claude auth marker: {e}")
 
-            # Run Claude Code in headless mode with comprehensive permissions for Next.js development
-            cmd = [
-                'claude', 
-                '--print', prompt,
-                '--output-format', 'json',
-                '--allowedTools', 'Bash', 'Read', 'Edit', 'Write', 'MultiEdit', 'Glob', 'Grep', 'WebFetch', 'WebSearch',
-                '--append-system-prompt', system_prompt
-            ]
+def _kill_process_group(pgid: int):
+    """Kill every process in a process group"""
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def install_pidfd_child_watcher() -> bool:
+    """Wait for subprocesses via pidfds on the event loop instead of one waiter thread per child"""
+    if sys.version_info >= (3, 12):
+        # asyncio already prefers pidfds when the kernel supports them
+        return True
+    
+    if not hasattr(os, 'pidfd_open'):
+        return False
+    
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError as e:
+        # Kernels older than 5.3 return ENOSYS; keep the default threaded watcher
+        logger.debug(f"pidfd_open unavailable, using threaded child watcher: {e}")
+        return False
+    
+    asyncio.set_child_watcher(asyncio.PidfdChildWatcher())
+    return True
+
+class ClaudeExecutor:
+    __slots__ = ('repo_manager', 'github_client', 'claude_timeout', 'max_worktrees_per_repo', '_repo_slots')
+    
+    def __init__(self, repo_manager: RepositoryManager, github_client: GitHubClient, claude_timeout: int = 1800,
+                 max_worktrees_per_repo: int = 4):
+        self.repo_manager = repo_manager
+        self.github_client = github_client
+        self.claude_timeout = claude_timeout
+        self.max_worktrees_per_repo = max_worktrees_per_repo
+        # repo_url -> semaphore bounding how many worktrees of that repository are live at once
+        self._repo_slots: Dict[str, asyncio.Semaphore] = {}
+        
+    async def execute_issue_fix(self, repo_url: str, issue_number: int, issue_title: str, issue_body: str) -> Tuple[bool, str]:
+        """
+        Execute Claude Code to fix an issue using persistent repository:
+        1. Prepare a worktree for the issue (sync and create branch)
+        2. Ask Claude to fix the issue in the repo directory
+        3. Create PR
+        """
+        repo_slots = self._repo_slots.get(repo_url)
+        if repo_slots is None:
+            repo_slots = self._repo_slots[repo_url] = asyncio.Semaphore(self.max_worktrees_per_repo)
+        
+        # Issues on the same repository work in separate worktrees, so only their number is limited
+        async with repo_slots:
+            return await self._execute_in_worktree(issue_number, issue_title, issue_body)
+    
+    async def _execute_in_worktree(self, issue_number: int, issue_title: str, issue_body: str) -> Tuple[bool, str]:
+        """Prepare the issue's worktree, run Claude Code in it and open the PR"""
+        try:
+            # Prepare repository for this issue
+            prep_success, prep_msg = await asyncio.to_thread(self.repo_manager.prepare_for_issue, issue_number)
+            if not prep_success:
+                return False, f"Failed to prepare repository: {prep_msg}"
+            
+            logger.info(f"Repository prepared: {prep_msg}")
+            
+            # Get the issue's worktree directory
+            repo_path = self.repo_manager.get_worktree_directory(issue_number)
+            
+            # Execute Claude Code to fix the issue
+            fix_prompt = self._build_fix_prompt(issue_number, issue_title, issue_body)
+            fix_result = await self._run_claude_code(repo_path, fix_prompt)
             
+            if not fix_result.success:
+                # Clean up on failure
+                await asyncio.to_thread(self.repo_manager.cleanup_after_issue, issue_number, success=False)
+                return False, f"Claude Code execution failed: {fix_result.message}"
+            
+            # Create PR
+            branch_name = f"fix-issue-{issue_number}"
+            pr_success, pr_msg = await self._create_pr(repo_path, branch_name, issue_number, issue_title)
+            
+            if not pr_success:
+                # Clean up on PR failure
+                await asyncio.to_thread(self.repo_manager.cleanup_after_issue, issue_number, success=False)
+                return False, f"Failed to create PR: {pr_msg}"
+            
+            # Clean up on success (but keep the branch since PR was created)
+            await asyncio.to_thread(self.repo_manager.cleanup_after_issue, issue_number, success=True)
+            return True, f"Successfully processed issue #{issue_number}. {pr_msg}"
+            
+        except Exception as e:
+            logger.error(f"Error executing issue fix: {e}")
+            # Clean up on exception
+            await asyncio.to_thread(self.repo_manager.cleanup_after_issue, issue_number, success=False)
+            return False, str(e)
+    
+    def _build_fix_prompt(self, issue_number: int, issue_title: str, issue_body: str) -> bytes:
+        """Build intelligent system prompt for Claude Code, encoded and ready for stdin"""
+        values = {
+            'issue_number': str(issue_number).encode(),
+            'issue_title': issue_title.encode(),
+            'issue_body': issue_body.encode()
+        }
+        parts = [_PROMPT_CHUNKS[0]]
+        for slot, chunk in zip(_PROMPT_SLOTS, _PROMPT_CHUNKS[1:]):
+            parts.append(values[slot])
+            parts.append(chunk)
+        return b''.join(parts)
+    
+    async def _run_claude_code(self, repo_path: str, prompt: bytes) -> ClaudeRunResult:
+        """Execute Claude Code using headless SDK"""
+        try:
             logger.info("Executing Claude Code in headless mode...")
-            logger.debug(f"Claude command: {' '.join(cmd)} (cwd={repo_path})")
-            result = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Parse JSON response to get execution details
-                try:
-                    response_data = json.loads(result.stdout)
-                    
-                    # Log execution details
-                    if 'content' in response_data:
-                        logger.info(f"Claude Code response: {response_data['content'][:200]}...")
-                    
-                    if 'cost' in response_data:
-                        logger.info(f"Execution cost: {response_data['cost']}")
-                        
-                    return True, "Claude Code executed successfully"
-                    
-                except json.JSONDecodeError:
-                    # If not JSON, treat as success anyway
-                    logger.info("Claude Code executed successfully (non-JSON response)")
-                    return True, "Claude Code executed successfully"
+            if logger.isEnabledFor(logging.DEBUG):
+                # Joining the argv copies the whole system prompt, so only do it when it is logged
+                logger.debug("Claude command: %s (cwd=%s)", ' '.join(CLAUDE_ARGV), repo_path)
+            proc = await asyncio.create_subprocess_exec(
+                *CLAUDE_ARGV,
+                cwd=repo_path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self.repo_manager.workspace_env,
+                limit=STREAM_LINE_LIMIT,
+                # Its own process group, so the tools it starts can be killed along with it
+                start_new_session=True
+            )
+            finished = False
+            try:
+                _, result_event, stderr = await asyncio.wait_for(
+                    asyncio.gather(
+                        _write_stdin(proc.stdin, prompt),
+                        _read_result_event(proc.stdout),
+                        _read_tail(proc.stderr, STDERR_TAIL_BYTES)
+                    ),
+                    timeout=self.claude_timeout
+                )
+                await proc.wait()
+                finished = True
+            finally:
+                if not finished:
+                    # On timeout, errors and cancellation alike, nothing may keep running in the worktree
+                    # or hold Claude's pipes open, which would also block the wait below
+                    _kill_process_group(proc.pid)
+                    await proc.wait()
+            
+            if proc.returncode == 0:
+                if result_event is None:
+                    # No result event, treat as success anyway
+                    logger.info("Claude Code executed successfully (no result event)")
+                    return ClaudeRunResult(True, "Claude Code executed successfully")
+                
+                # Log execution details (formatting is deferred until a handler needs it)
+                if 'result' in result_event:
+                    logger.info("Claude Code response: %.200s...", result_event['result'])
+                
+                cost = result_event.get('total_cost_usd', result_event.get('cost_usd'))
+                if cost is not None:
+                    logger.info("Execution cost: %s", cost)
+                
+                return ClaudeRunResult(True, "Claude Code executed successfully", cost)
             else:
-                error_msg = result.stderr or result.stdout
+                if stderr:
+                    error_msg = stderr.decode(errors='replace')
+                else:
+                    error_msg = str((result_event or {}).get('result', f"exit status {proc.returncode}"))
                 logger.error(f"Claude Code failed: {error_msg}")
-                return False, f"Claude Code failed: {error_msg}"
+                if is_auth_error(stderr or error_msg.encode()):
+                    # Make the next startup check authentication for real
+                    set_claude_auth_cached(False)
+                return ClaudeRunResult(False, f"Claude Code failed: {error_msg}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Claude Code execution timed out")
-            return False, "Claude Code execution timed out"
+        except asyncio.TimeoutError:
+            logger.error(f"Claude Code execution timed out after {self.claude_timeout}s")
+            return ClaudeRunResult(False, "Claude Code execution timed out")
         except Exception as e:
             logger.error(f"Error executing Claude Code: {e}")
-            return False, str(e)
+            return ClaudeRunResult(False, str(e))
     
-    def _create_pr(self, repo_path: str, branch_name: str, issue_number: int, issue_title: str) -> Tuple[bool, str]:
+    async def _create_pr(self, repo_path: str, branch_name: str, issue_number: int, issue_title: str) -> Tuple[bool, str]:
         """Push branch and create PR"""
         try:
             # Ensure we have commits to push
-            status_result = subprocess.run(['git', 'status', '--porcelain'], cwd=repo_path, capture_output=True, text=True)
-            commit_result = subprocess.run(['git', 'log', '--oneline', f'origin/main..{branch_name}'], cwd=repo_path, capture_output=True, text=True)
+            commit_count = await asyncio.to_thread(self.repo_manager.count_new_commits, branch_name)
             
-            if not commit_result.stdout.strip():
+            if not commit_count:
                 return False, "No commits found on branch - Claude Code may not have made any changes"
             
-            logger.info(f"Found commits to push: {len(commit_result.stdout.strip().split())}")
-            
-            # Push branch
-            push_cmd = ['git', 'push', '-u', 'origin', branch_name]
-            push_result = subprocess.run(push_cmd, cwd=repo_path, capture_output=True, text=True)
-            
-            if push_result.returncode != 0:
-                return False, f"Failed to push branch: {push_result.stderr}"
+            logger.info(f"Found commits to push: {commit_count}")
             
-            # Create PR using GitHub CLI
             pr_title = f"Fix: {issue_title} (#{issue_number})"
             pr_body = f"Automated fix for issue #{issue_number}\n\nCloses #{issue_number}"
             
-            pr_cmd = ['gh', 'pr', 'create', '--title', pr_title, '--body', pr_body]
-            pr_result = subprocess.run(pr_cmd, cwd=repo_path, capture_output=True, text=True)
+            # Push branch, creating the PR through the GitHub API as soon as the remote accepts the ref
+            # instead of waiting for the push process to wind down. No -u: nothing reads the upstream,
+            # and writing it would edit the config shared by all worktrees outside the git lock.
+            proc = await asyncio.create_subprocess_exec(
+                GIT_BIN, 'push', '--porcelain', 'origin', branch_name,
+                cwd=repo_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self.repo_manager.git_env
+            )
+            stderr_task = asyncio.create_task(_read_tail(proc.stderr, STDERR_TAIL_BYTES))
+            pr_task = None
+            
+            async for line in proc.stdout:
+                if pr_task is None and _is_ref_pushed(line, branch_name):
+                    pr_task = asyncio.create_task(asyncio.to_thread(
+                        self.github_client.create_pull_request, branch_name, pr_title, pr_body
+                    ))
+            
+            push_stderr = await stderr_task
+            await proc.wait()
+            
+            if pr_task is None:
+                return False, f"Failed to push branch: {push_stderr.decode(errors='replace')}"
+            
+            pr_success, pr_result = await pr_task
             
-            if pr_result.returncode == 0:
-                return True, f"Created PR: {pr_result.stdout.strip()}"
+            if pr_success:
+                return True, f"Created PR: {pr_result}"
             else:
-                return False, f"Failed to create PR: {pr_result.stderr}"
+                return False, f"Failed to create PR: {pr_result}"
                 
         except Exception as e:
             return False, str(e)
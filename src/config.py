@@ -1,25 +1,56 @@
 import os
+from dataclasses import dataclass, field
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+@dataclass(frozen=True, slots=True)
 class Config:
     # GitHub Configuration
-    GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-    REPO_OWNER = os.getenv('REPO_OWNER')
-    REPO_NAME = os.getenv('REPO_NAME')
-    TARGET_USER = os.getenv('TARGET_USER')
+    GITHUB_TOKEN: Optional[str]
+    REPO_OWNER: Optional[str]
+    REPO_NAME: Optional[str]
+    TARGET_USER: Optional[str]
     
     # Polling Configuration
-    POLL_INTERVAL_MINUTES = int(os.getenv('POLL_INTERVAL_MINUTES', '5'))
+    POLL_INTERVAL_MINUTES: int
+    
+    # Execution Configuration
+    MAX_CONCURRENT_ISSUES: int
+    MAX_WORKTREES_PER_REPO: int
+    CLAUDE_TIMEOUT_SECONDS: int
+    WORKTREE_DIR: str
     
     # Logging Configuration
-    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
-    LOG_FILE = os.getenv('LOG_FILE', 'logs/automator.log')
+    LOG_LEVEL: str
+    LOG_FILE: str
+    
+    # Derived once from the fields above
+    REPO_URL: str = field(init=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, 'REPO_URL', f"https://github.com/{self.REPO_OWNER}/{self.REPO_NAME}.git")
     
     @classmethod
-    def validate(cls):
+    def from_env(cls) -> 'Config':
+        """Read configuration from the environment"""
+        return cls(
+            GITHUB_TOKEN=os.getenv('GITHUB_TOKEN'),
+            REPO_OWNER=os.getenv('REPO_OWNER'),
+            REPO_NAME=os.getenv('REPO_NAME'),
+            TARGET_USER=os.getenv('TARGET_USER'),
+            POLL_INTERVAL_MINUTES=int(os.getenv('POLL_INTERVAL_MINUTES', '5')),
+            MAX_CONCURRENT_ISSUES=int(os.getenv('MAX_CONCURRENT_ISSUES', '4')),
+            MAX_WORKTREES_PER_REPO=int(os.getenv('MAX_WORKTREES_PER_REPO', '4')),
+            CLAUDE_TIMEOUT_SECONDS=int(os.getenv('CLAUDE_TIMEOUT_SECONDS', '1800')),
+            WORKTREE_DIR=os.getenv('WORKTREE_DIR', '/app/worktrees'),
+            LOG_LEVEL=os.getenv('LOG_LEVEL', 'INFO'),
+            LOG_FILE=os.getenv('LOG_FILE', 'logs/automator.log')
+        )
+    
+    def validate(self):
         """Validate required configuration"""
         required_vars = [
             'GITHUB_TOKEN', 'REPO_OWNER', 'REPO_NAME', 'TARGET_USER'
@@ -27,7 +58,7 @@ class Config:
         
         missing_vars = []
         for var in required_vars:
-            if not getattr(cls, var):
+            if not getattr(self, var):
                 missing_vars.append(var)
         
         if missing_vars:
@@ -35,7 +66,9 @@ class Config:
         
         return True
     
-    @classmethod
-    def get_repo_url(cls):
+    def get_repo_url(self):
         """Get repository URL"""
-        return f"https://github.com/{cls.REPO_OWNER}/{cls.REPO_NAME}.git"
\ No newline at end of file
+        return self.REPO_URL
+
+# Configuration shared by the whole process
+CONFIG = Config.from_env()
\ No newline at end of file
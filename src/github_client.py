@@ -1,62 +1,194 @@
-import os
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import List, Optional
-from github import Github
-from github.Issue import Issue
+import functools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from github import Github, GithubRetry
+from github.Repository import Repository
 
 logger = logging.getLogger(__name__)
 
+GRAPHQL_URL = 'https://api.github.com/graphql'
+ISSUES_URL = 'https://api.github.com/repos/{owner}/{name}/issues'
+
+# Incremental queries reach this far behind the previous one to absorb clock skew with GitHub
+POLL_OVERLAP_SECONDS = 60
+
+# Only the fields the automator reads, for the newest issues (the issues connection excludes PRs)
+ISSUES_BY_USER_QUERY = """
+query($owner: String!, $name: String!, $creator: String!, $limit: Int!, $states: [IssueState!], $since: DateTime) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $limit, states: $states, filterBy: {createdBy: $creator, since: $since}, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        title
+        body
+        state
+        createdAt
+        author { login }
+      }
+    }
+  }
+}
+"""
+
+@dataclass(slots=True)
+class IssueSummary:
+    """The parts of an open issue needed to work on it"""
+    number: int
+    title: str
+    body: str
+    author: str
+    created_at: str
+
+@functools.lru_cache(maxsize=4)
+def _connect(token: str, full_name: str, pool_size: int) -> Tuple[Github, Repository]:
+    """Authenticate and look up a repository once per token and repository"""
+    # One pooled, keep-alive session shared by polling, comments and PR creation.
+    # GithubRetry backs off on rate limits, honoring Retry-After and X-RateLimit-Reset.
+    github = Github(token, retry=GithubRetry(), pool_size=pool_size)
+    return github, github.get_repo(full_name)
+
+@functools.lru_cache(maxsize=4)
+def _open_session(token: str, pool_size: int) -> requests.Session:
+    """Create one keep-alive session per token for the direct REST and GraphQL calls"""
+    session = requests.Session()
+    session.headers['Authorization'] = f'bearer {token}'
+    session.headers['Accept'] = 'application/vnd.github+json'
+    
+    # Pooled connections sized like PyGithub's; connection errors (e.g. a keep-alive
+    # connection GitHub closed between polls) are retried on a fresh connection
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=3)
+    session.mount('https://', adapter)
+    return session
+
 class GitHubClient:
-    def __init__(self, token: str, repo_owner: str, repo_name: str):
-        self.github = Github(token)
-        self.repo = self.github.get_repo(f"{repo_owner}/{repo_name}")
+    def __init__(self, token: str, repo_owner: str, repo_name: str, pool_size: int = 10):
+        # Clients recreated for the same repository reuse the session and repository metadata
+        self.github, self.repo = _connect(token, f"{repo_owner}/{repo_name}", pool_size)
         self.repo_owner = repo_owner
         self.repo_name = repo_name
         
-    def get_unprocessed_issues_by_user(self, username: str, processed_issues: set) -> List[Issue]:
+        # Issue polling goes through GraphQL, which returns every needed field in one request
+        self.session = _open_session(token, pool_size)
+        
+        # username -> (ETag of the last issue probe, open issues fetched at that point)
+        self._etag_cache: Dict[str, Tuple[str, List[IssueSummary]]] = {}
+        # username -> epoch time the cached issues were queried at
+        self._last_poll_time: Dict[str, float] = {}
+        
+    def get_unprocessed_issues_by_user(self, username: str, processed_issues: set, limit: int = 50) -> List[IssueSummary]:
         """Get unprocessed open issues created by a specific user"""
         try:
-            # Get open issues by the target user
-            issues = self.repo.get_issues(
-                state='open',
-                creator=username,
-                sort='created',
-                direction='desc'
+            etag, issues = self._etag_cache.get(username, (None, None))
+            
+            # Conditional probe of the user's most recently updated issue; a 304 costs no rate limit
+            # and means no issue by the user was opened, edited or closed since the last poll
+            response = self.session.get(
+                ISSUES_URL.format(owner=self.repo_owner, name=self.repo_name),
+                params={'creator': username, 'state': 'all', 'sort': 'updated', 'direction': 'desc', 'per_page': 1},
+                headers={'If-None-Match': etag} if etag else None,
+                timeout=30
             )
             
+            if response.status_code == 304 and issues is not None:
+                logger.debug("Issues by user '%s' unchanged since last poll", username)
+            else:
+                response.raise_for_status()
+                poll_started = time.time()
+                last_poll_time = self._last_poll_time.get(username)
+                
+                if issues is None or last_poll_time is None:
+                    issues, _ = self._query_issues(username, limit)
+                else:
+                    # Only issues touched since the last query are fetched and merged into the cached ones
+                    updated_issues, closed_numbers = self._query_issues(username, limit, since=last_poll_time - POLL_OVERLAP_SECONDS)
+                    issues_by_number = {issue.number: issue for issue in issues}
+                    closed_cached = False
+                    for number in closed_numbers:
+                        if issues_by_number.pop(number, None) is not None:
+                            closed_cached = True
+                    
+                    if closed_cached and len(issues) >= limit:
+                        # A full cache was cut off at the limit, so older open issues may now fit in the freed slots
+                        issues, _ = self._query_issues(username, limit)
+                    else:
+                        for issue in updated_issues:
+                            issues_by_number[issue.number] = issue
+                        issues = sorted(issues_by_number.values(), key=lambda issue: issue.number, reverse=True)[:limit]
+                
+                self._etag_cache[username] = (response.headers.get('ETag'), issues)
+                self._last_poll_time[username] = poll_started
+            
             unprocessed_issues = []
-            issue_count = 0
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             
             for issue in issues:
-                issue_count += 1
-                
-                # Skip pull requests
-                if issue.pull_request:
-                    logger.debug(f"Skipping PR #{issue.number}")
-                    continue
-                
                 # Check if already processed
                 if issue.number in processed_issues:
-                    logger.debug(f"Issue #{issue.number} already processed, skipping")
+                    if debug_enabled:
+                        logger.debug("Issue #%s already processed, skipping", issue.number)
                     continue
                 
                 # This is an unprocessed issue by the target user
                 unprocessed_issues.append(issue)
-                logger.info(f"Found unprocessed issue #{issue.number}: {issue.title} by {issue.user.login}")
-                
-                # Limit to checking first 50 issues to avoid API rate limits
-                if issue_count >= 50:
-                    logger.info("Checked 50 issues, stopping to avoid rate limits")
-                    break
+                logger.info("Found unprocessed issue #%s: %s by %s", issue.number, issue.title, issue.author)
             
-            logger.info(f"Checked {issue_count} issues, found {len(unprocessed_issues)} unprocessed issues by user '{username}'")
+            # Limit to checking the newest issues to avoid API rate limits
+            if len(issues) >= limit:
+                logger.info("Checked %s issues, stopping to avoid rate limits", limit)
+            
+            logger.info("Checked %s issues, found %s unprocessed issues by user '%s'", len(issues), len(unprocessed_issues), username)
             return unprocessed_issues
             
         except Exception as e:
             logger.error(f"Error fetching issues: {e}")
             return []
     
+    def _query_issues(self, username: str, limit: int, since: Optional[float] = None) -> Tuple[List[IssueSummary], Set[int]]:
+        """Get the newest issues created by a user in a single GraphQL query.
+        
+        Without `since` only open issues are returned. With it, GitHub filters to issues updated
+        after that epoch time and closed ones are included so they can be dropped from a cache.
+        Returns the open issues and the numbers of the closed ones.
+        """
+        variables = {
+            'owner': self.repo_owner,
+            'name': self.repo_name,
+            'creator': username,
+            'limit': limit,
+            'states': ['OPEN'] if since is None else ['OPEN', 'CLOSED'],
+            'since': None if since is None else time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(since))
+        }
+        response = self.session.post(
+            GRAPHQL_URL,
+            json={'query': ISSUES_BY_USER_QUERY, 'variables': variables},
+            timeout=30
+        )
+        response.raise_for_status()
+        payload = response.json()
+        
+        if payload.get('errors'):
+            raise RuntimeError(f"GraphQL errors: {payload['errors']}")
+        
+        open_issues = []
+        closed_numbers = set()
+        for node in payload['data']['repository']['issues']['nodes']:
+            if node['state'] != 'OPEN':
+                closed_numbers.add(node['number'])
+                continue
+            open_issues.append(IssueSummary(
+                number=node['number'],
+                title=node['title'],
+                body=node['body'] or "",
+                author=(node['author'] or {}).get('login', username),
+                created_at=node['createdAt']
+            ))
+        
+        return open_issues, closed_numbers
+    
     def close_issue(self, issue_number: int, comment: str = None) -> bool:
         """Close an issue with optional comment"""
         try:
@@ -83,4 +215,22 @@ class GitHubClient:
             
         except Exception as e:
             logger.error(f"Error adding comment to issue #{issue_number}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def create_pull_request(self, branch_name: str, title: str, body: str, base: str = 'main') -> Tuple[bool, str]:
+        """Open a pull request from an already pushed branch"""
+        try:
+            pull_request = self.repo.create_pull(title=title, body=body, base=base, head=branch_name)
+            logger.info(f"Created PR #{pull_request.number} from {branch_name}")
+            return True, pull_request.html_url
+            
+        except Exception as e:
+            logger.error(f"Error creating PR from {branch_name}: {e}")
+            return False, str(e)
+    
+    def close(self):
+        """Close the underlying HTTP connections"""
+        self.session.close()
+        self.github.close()
+        _open_session.cache_clear()
+        _connect.cache_clear()
\ No newline at end of file
@@ -1,39 +1,71 @@
 import threading
 import logging
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import socket
 import os
 
 logger = logging.getLogger(__name__)
 
-class HealthHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/' or self.path == '/health':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'GitHub Issue Automator is running')
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress default HTTP server logging
-        pass
+HEALTH_PATHS = (b'/', b'/health')
+
+def _build_response(status: bytes, body: bytes) -> bytes:
+    """Prebuild a complete HTTP/1.1 response that closes the connection"""
+    return (
+        b'HTTP/1.1 ' + status + b'\r\n'
+        b'Content-Type: text/plain\r\n'
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+        b'Connection: close\r\n'
+        b'\r\n' + body
+    )
+
+OK_RESPONSE = _build_response(b'200 OK', b'GitHub Issue Automator is running')
+NOT_FOUND_RESPONSE = _build_response(b'404 Not Found', b'')
+
+def _handle_connection(conn: socket.socket):
+    """Answer a single probe; only the request line is looked at"""
+    with conn:
+        conn.settimeout(5)
+        request = b''
+        try:
+            while b'\r\n\r\n' not in request and len(request) < 8192:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                request += chunk
+            
+            # Request line: METHOD PATH VERSION
+            parts = request.split(b'\r\n', 1)[0].split(b' ')
+            path = parts[1] if len(parts) > 1 else b''
+            conn.sendall(OK_RESPONSE if path in HEALTH_PATHS else NOT_FOUND_RESPONSE)
+        except OSError:
+            pass
+
+def _serve_forever(server: socket.socket):
+    """Accept probes one at a time"""
+    while True:
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            # Listening socket was closed
+            return
+        _handle_connection(conn)
 
 def start_health_server():
-    """Start a simple HTTP server for health checks"""
+    """Start a minimal socket-level HTTP responder for health checks"""
     port = int(os.environ.get('PORT', 8080))
     
     try:
-        server = HTTPServer(('0.0.0.0', port), HealthHandler)
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(('0.0.0.0', port))
+        server.listen(16)
         logger.info(f"Health check server starting on port {port}")
         
         # Run server in a separate thread
-        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread = threading.Thread(target=_serve_forever, args=(server,), name='health-server')
         server_thread.daemon = True
         server_thread.start()
         
         return server
     except Exception as e:
         logger.error(f"Failed to start health server: {e}")
-        return None
\ No newline at end of file
+        return None
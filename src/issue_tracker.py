@@ -1,21 +1,53 @@
 import os
 import json
+import heapq
+import atexit
 import logging
+import queue
+import threading
 import time
-from typing import Set, List, Dict
+from typing import Set, List, Dict, Optional, Tuple
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+def _json_dumps(data) -> bytes:
+    """Serialize compactly, with orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode()
+
+_json_loads = orjson.loads if orjson else json.loads
+
+# Kinds of work handed to the writer thread
+_WRITE_SNAPSHOT = 'snapshot'
+_WRITE_LOG = 'log'
+_WRITE_FLUSH = 'flush'
+
 class IssueTracker:
     """Track processed GitHub issues and failed attempts with backoff"""
     
-    def __init__(self, storage_path: str = "data/processed_issues.json"):
+    def __init__(self, storage_path: str = "data/processed_issues.json", compact_after: int = 500):
         self.storage_path = Path(storage_path)
+        # Changes since the last snapshot are appended here as JSON lines: {"op": "p"|"f", "n": issue, ...}
+        self.log_path = self.storage_path.with_suffix('.log')
+        self.compact_after = compact_after
         self.processed_issues: Set[int] = set()
         self.failed_attempts: Dict[int, Dict] = {}  # issue_number -> {count, last_attempt, next_retry}
+        self._log_entries = 0
         self._ensure_storage_dir()
         self._load_processed_issues()
+        self._log_fh = open(self.log_path, 'ab', buffering=0)
+        
+        # Disk writes happen on a writer thread so marking an issue never waits on I/O
+        self._write_queue = queue.SimpleQueue()
+        threading.Thread(target=self._writer_loop, name='issue-tracker-writer', daemon=True).start()
+        atexit.register(self.flush)
     
     def _ensure_storage_dir(self):
         """Ensure the storage directory exists"""
@@ -24,40 +56,150 @@ class IssueTracker:
     def _load_processed_issues(self):
         """Load processed issue IDs and failed attempts from storage file"""
         try:
-            if self.storage_path.exists():
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.processed_issues = set(data.get('processed_issues', []))
-                    self.failed_attempts = data.get('failed_attempts', {})
-                    # Convert string keys back to int
-                    self.failed_attempts = {int(k): v for k, v in self.failed_attempts.items()}
-                    logger.info(f"Loaded {len(self.processed_issues)} processed issues and {len(self.failed_attempts)} failed attempts")
-            else:
-                logger.info("No previous issue tracking file found, starting fresh")
+            with open(self.storage_path, 'rb') as f:
+                data = _json_loads(f.read())
+                self.processed_issues = set(data.get('processed_issues', []))
+                failed_attempts = data.get('failed_attempts', [])
+                if isinstance(failed_attempts, dict):
+                    # Older snapshots stored an object keyed by the issue number as a string
+                    failed_attempts = ((int(k), v) for k, v in failed_attempts.items())
+                self.failed_attempts = dict(failed_attempts)
+        except FileNotFoundError:
+            logger.info("No previous issue tracking file found, starting fresh")
         except Exception as e:
             logger.error(f"Error loading processed issues: {e}")
             self.processed_issues = set()
             self.failed_attempts = {}
+        
+        # Replay changes made after the snapshot was written; a bad log never discards the snapshot
+        try:
+            self._replay_log()
+        except Exception as e:
+            logger.error(f"Error replaying issue tracking log: {e}")
+        
+        logger.info(f"Loaded {len(self.processed_issues)} processed issues and {len(self.failed_attempts)} failed attempts")
+    
+    def _replay_log(self):
+        """Apply the append-only log record by record, cutting off a last record torn by a crash"""
+        try:
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if line.strip():
+                    self._replay(_json_loads(line))
+                    self._log_entries += 1
+            except (ValueError, KeyError, TypeError) as e:
+                if offset + len(line) == len(data):
+                    # Truncate back to the last good newline so the next append starts on a clean line
+                    logger.warning(f"Dropping torn last record of {self.log_path}: {e}")
+                    os.truncate(self.log_path, offset)
+                    return
+                logger.warning(f"Skipping unreadable record in {self.log_path}: {e}")
+            offset += len(line)
+        
+        if data and not data.endswith(b'\n'):
+            # The last record is complete but lost its newline; terminate it before appending more
+            with open(self.log_path, 'ab') as f:
+                f.write(b'\n')
+    
+    def _replay(self, record):
+        """Apply one append-only log record to the in-memory state"""
+        issue_number = record['n']
+        if record['op'] == 'p':
+            self.processed_issues.add(issue_number)
+            self.failed_attempts.pop(issue_number, None)
+        else:
+            self.failed_attempts[issue_number] = {
+                'count': record['count'],
+                'last_attempt': record['last_attempt'],
+                'next_retry': record['next_retry'],
+                'backoff_minutes': record['backoff_minutes']
+            }
     
     def _save_processed_issues(self):
         """Save processed issue IDs and failed attempts to storage file"""
         try:
             data = {
-                'processed_issues': sorted(list(self.processed_issues)),
-                'failed_attempts': {str(k): v for k, v in self.failed_attempts.items()},
+                'processed_issues': list(self.processed_issues),
+                # [issue_number, info] pairs keep the int keys without a str round-trip
+                'failed_attempts': list(self.failed_attempts.items()),
                 'last_updated': time.time()
             }
-            with open(self.storage_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.debug(f"Saved {len(self.processed_issues)} processed issues and {len(self.failed_attempts)} failed attempts")
+            # Serialized here so the writer thread gets a consistent copy of the state
+            self._write_queue.put((_WRITE_SNAPSHOT, _json_dumps(data)))
+            self._log_entries = 0
+            logger.debug("Queued snapshot of %s processed issues and %s failed attempts", len(self.processed_issues), len(self.failed_attempts))
         except Exception as e:
             logger.error(f"Error saving processed issues: {e}")
     
+    def _writer_loop(self):
+        """Apply queued writes, coalescing whatever piled up since the last pass"""
+        while True:
+            items = [self._write_queue.get()]
+            while True:
+                try:
+                    items.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            snapshot = None
+            log_chunks = []
+            covered = 0  # How many leading log chunks the snapshot includes
+            flush_events = []
+            for kind, payload in items:
+                if kind == _WRITE_SNAPSHOT:
+                    # A snapshot covers everything logged before it, but those records are only
+                    # dropped once the snapshot is on disk
+                    snapshot = payload
+                    covered = len(log_chunks)
+                elif kind == _WRITE_LOG:
+                    log_chunks.append(payload)
+                else:
+                    flush_events.append(payload)
+            
+            if snapshot is not None:
+                try:
+                    # Swap in a complete, synced file so neither a crash nor a power loss mid-write
+                    # leaves a truncated snapshot; this runs off the request path, so fsync is cheap
+                    tmp_path = self.storage_path.with_suffix('.tmp')
+                    with open(tmp_path, 'wb') as f:
+                        f.write(snapshot)
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.storage_path)
+                    
+                    # Everything in the log is now part of the snapshot
+                    self._log_fh.truncate(0)
+                except Exception as e:
+                    # Keep the log and append every record, so nothing depends on the lost snapshot
+                    logger.error(f"Error writing issue tracking snapshot: {e}")
+                else:
+                    log_chunks = log_chunks[covered:]
+            
+            if log_chunks:
+                try:
+                    self._log_fh.write(b''.join(log_chunks))
+                except Exception as e:
+                    logger.error(f"Error appending to issue tracking log: {e}")
+            
+            for event in flush_events:
+                event.set()
+    
+    def flush(self, timeout: float = 10.0):
+        """Wait until all queued tracker writes are on disk"""
+        done = threading.Event()
+        self._write_queue.put((_WRITE_FLUSH, done))
+        done.wait(timeout)
+    
     def is_processed(self, issue_number: int) -> bool:
         """Check if an issue has already been processed"""
         return issue_number in self.processed_issues
     
-    def should_retry_issue(self, issue_number: int) -> bool:
+    def should_retry_issue(self, issue_number: int, current_time: Optional[float] = None) -> bool:
         """Check if a failed issue should be retried based on backoff"""
         if issue_number in self.processed_issues:
             return False  # Already successfully processed
@@ -67,26 +209,48 @@ class IssueTracker:
         
         failure_info = self.failed_attempts[issue_number]
         next_retry = failure_info.get('next_retry', 0)
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         
         if current_time >= next_retry:
             return True  # Backoff period has passed
         
         return False  # Still in backoff period
     
+    def build_eligible_filter(self, current_time: Optional[float] = None) -> Tuple[Set[int], Set[int]]:
+        """Get the processed issues and the failed issues still in backoff, for checking many issues at once"""
+        if current_time is None:
+            current_time = time.time()
+        
+        not_ready = {
+            issue_number for issue_number, failure_info in self.failed_attempts.items()
+            if failure_info.get('next_retry', 0) > current_time
+        }
+        return self.processed_issues, not_ready
+    
     def mark_processed(self, issue_number: int):
         """Mark an issue as successfully processed"""
         if issue_number not in self.processed_issues:
             self.processed_issues.add(issue_number)
-            # Remove from failed attempts if it was there
+            # Remove from failed attempts if it was there; replaying the record drops it again
             if issue_number in self.failed_attempts:
                 del self.failed_attempts[issue_number]
+            self._append_log({'op': 'p', 'n': issue_number})
+            # Debug only: callers log the outcome, and bulk marking would otherwise flood the log
+            logger.debug("Marked issue #%s as processed", issue_number)
+    
+    def _append_log(self, record: Dict):
+        """Record a change in the append-only log, compacting it into the snapshot once it grows"""
+        self._write_queue.put((_WRITE_LOG, _json_dumps(record) + b'\n'))
+        self._log_entries += 1
+        
+        if self._log_entries >= self.compact_after:
             self._save_processed_issues()
-            logger.info(f"Marked issue #{issue_number} as processed")
     
-    def mark_failed(self, issue_number: int):
+    def mark_failed(self, issue_number: int, current_time: Optional[float] = None):
         """Mark an issue as failed with exponential backoff"""
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         
         if issue_number in self.failed_attempts:
             # Increment failure count
@@ -107,18 +271,18 @@ class IssueTracker:
             'backoff_minutes': backoff_minutes
         })
         
-        self._save_processed_issues()
-        logger.info(f"Marked issue #{issue_number} as failed (attempt {failure_count}). Next retry in {backoff_minutes} minutes")
+        self._append_log({'op': 'f', 'n': issue_number, **self.failed_attempts[issue_number]})
+        logger.info("Marked issue #%s as failed (attempt %s). Next retry in %s minutes", issue_number, failure_count, backoff_minutes)
     
     def get_processed_count(self) -> int:
         """Get the count of processed issues"""
         return len(self.processed_issues)
     
     def cleanup_old_issues(self, keep_last: int = 1000):
-        """Keep only the most recent N processed issues to prevent file from growing too large"""
+        """Keep only the most recent N processed issues and fold the append-only log into the snapshot"""
         if len(self.processed_issues) > keep_last:
             # Keep the highest issue numbers (most recent)
-            sorted_issues = sorted(self.processed_issues, reverse=True)
-            self.processed_issues = set(sorted_issues[:keep_last])
-            self._save_processed_issues()
-            logger.info(f"Cleaned up old issues, now tracking {len(self.processed_issues)} issues")
\ No newline at end of file
+            self.processed_issues = set(heapq.nlargest(keep_last, self.processed_issues))
+            logger.info(f"Cleaned up old issues, now tracking {len(self.processed_issues)} issues")
+        
+        self._save_processed_issues()
\ No newline at end of file
@@ -1,26 +1,41 @@
+import atexit
 import logging
-import os
-from datetime import datetime
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
 
 def setup_logging(log_level: str = 'INFO', log_file: str = 'logs/automator.log'):
     """Setup logging configuration"""
     
     # Create logs directory if it doesn't exist
-    log_dir = os.path.dirname(log_file)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    
+    # File and console output happen on a dedicated listener thread, so logging
+    # callers only pay for enqueueing a record
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    output_handlers = [
+        logging.FileHandler(log_file),
+        logging.StreamHandler()  # Also log to console
+    ]
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The queue handler only merges args into the message; the listener's handlers add the prefix
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     
     # Configure logging
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()  # Also log to console
-        ]
+        handlers=[queue_handler]
     )
     
     logger = logging.getLogger(__name__)
     logger.info(f"Logging initialized - Level: {log_level}, File: {log_file}")
     
-    return logger
\ No newline at end of file
+    return logger
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 
 import time
+import asyncio
 import logging
 import schedule
 import subprocess
 
-from config import Config
+from config import CONFIG
 from logger import setup_logging
 from github_client import GitHubClient
-from claude_executor import ClaudeExecutor
+from claude_executor import (
+    ClaudeExecutor, CLAUDE_BIN, install_pidfd_child_watcher,
+    is_auth_error, is_claude_auth_cached, set_claude_auth_cached
+)
 from health_server import start_health_server
 from issue_tracker import IssueTracker
 from repo_manager import RepositoryManager
@@ -16,127 +20,150 @@ from repo_manager import RepositoryManager
 # Initialize issue tracker and repository manager
 issue_tracker = IssueTracker()
 repo_manager = None  # Will be initialized in main()
+github_client = None  # Will be initialized in main()
+claude_executor = None  # Will be initialized in main()
+async_runner = asyncio.Runner()  # Shared event loop across polling cycles
 
 def process_new_issues():
     """Main function to check for and process new issues"""
     logger = logging.getLogger(__name__)
     
     try:
-        # Initialize clients
-        github_client = GitHubClient(
-            token=Config.GITHUB_TOKEN,
-            repo_owner=Config.REPO_OWNER,
-            repo_name=Config.REPO_NAME
-        )
-        
-        # Use global repo_manager
-        global repo_manager
-        if not repo_manager:
-            logger.error("Repository manager not initialized")
+        # Use global repo_manager, github_client and claude_executor
+        global repo_manager, github_client, claude_executor
+        if not repo_manager or not github_client or not claude_executor:
+            logger.error("Repository manager, GitHub client or Claude executor not initialized")
             return
-            
-        claude_executor = ClaudeExecutor(repo_manager)
         
         # Get unprocessed issues by target user
         unprocessed_issues = github_client.get_unprocessed_issues_by_user(
-            username=Config.TARGET_USER,
+            username=CONFIG.TARGET_USER,
             processed_issues=issue_tracker.processed_issues
         )
         
         if not unprocessed_issues:
-            logger.info(f"No unprocessed issues found by user '{Config.TARGET_USER}'")
+            logger.info(f"No unprocessed issues found by user '{CONFIG.TARGET_USER}'")
             return
         
         logger.info(f"Found {len(unprocessed_issues)} unprocessed issues")
         
-        # Process each unprocessed issue that should be retried
+        # Only process issues that should be retried based on backoff
+        issues_to_process = []
+        processed, not_ready = issue_tracker.build_eligible_filter(time.time())
         for issue in unprocessed_issues:
-            # Check if this issue should be retried based on backoff
-            if not issue_tracker.should_retry_issue(issue.number):
-                logger.info(f"Skipping issue #{issue.number} (still in backoff period)")
+            if issue.number in processed or issue.number in not_ready:
+                logger.info("Skipping issue #%s (still in backoff period)", issue.number)
                 continue
-                
-            logger.info(f"Processing issue #{issue.number}: {issue.title}")
+            issues_to_process.append(issue)
+        
+        if issues_to_process:
+            async_runner.run(process_issues(github_client, claude_executor, issues_to_process))
+        
+    except Exception as e:
+        logger.error(f"Error in process_new_issues: {e}")
+
+async def process_issues(github_client: GitHubClient, claude_executor: ClaudeExecutor, issues: list):
+    """Process issues concurrently, bounded by MAX_CONCURRENT_ISSUES"""
+    semaphore = asyncio.Semaphore(CONFIG.MAX_CONCURRENT_ISSUES)
+    
+    async def process_with_limit(issue):
+        async with semaphore:
+            await process_issue(github_client, claude_executor, issue)
+    
+    await asyncio.gather(*(process_with_limit(issue) for issue in issues))
+
+async def process_issue(github_client: GitHubClient, claude_executor: ClaudeExecutor, issue):
+    """Fix a single issue and report the outcome on GitHub"""
+    logger = logging.getLogger(__name__)
+    
+    try:
+        logger.info(f"Processing issue #{issue.number}: {issue.title}")
+        
+        # Try to add comment to issue indicating we're working on it (optional)
+        try:
+            await asyncio.to_thread(
+                github_client.add_comment,
+                issue.number,
+                "🤖 Automated fix in progress. Claude Code is analyzing this issue..."
+            )
+        except Exception as e:
+            logger.warning(f"Could not add start comment to issue #{issue.number}: {e}")
+            logger.info("Continuing with issue processing despite comment failure")
+        
+        # Execute Claude Code to fix the issue
+        success, message = await claude_executor.execute_issue_fix(
+            repo_url=CONFIG.REPO_URL,
+            issue_number=issue.number,
+            issue_title=issue.title,
+            issue_body=issue.body or ""
+        )
+        
+        if success:
+            logger.info(f"Successfully processed issue #{issue.number}")
             
-            # Try to add comment to issue indicating we're working on it (optional)
+            # Try to add success comment and close issue (optional). The close posts no comment of
+            # its own, so the two requests can go out at once without reordering comments.
+            commented, closed = await asyncio.gather(
+                asyncio.to_thread(
+                    github_client.add_comment,
+                    issue.number,
+                    f"✅ Automated fix completed! {message}\n\n"
+                    "🤖 Issue automatically resolved by Claude Code automation."
+                ),
+                asyncio.to_thread(github_client.close_issue, issue.number)
+            )
+            if not commented:
+                logger.warning(f"Could not add success comment to issue #{issue.number}")
+            if not closed:
+                logger.warning(f"Could not close issue #{issue.number}")
+                logger.info("Issue was processed successfully but remains open due to permissions")
+            
+            # Mark as processed only on success
+            issue_tracker.mark_processed(issue.number)
+            logger.info(f"Issue #{issue.number} marked as processed")
+            
+        else:
+            logger.error(f"Failed to process issue #{issue.number}: {message}")
+            
+            # Try to add failure comment (optional)
             try:
-                github_client.add_comment(
+                await asyncio.to_thread(
+                    github_client.add_comment,
                     issue.number,
-                    "🤖 Automated fix in progress. Claude Code is analyzing this issue..."
+                    f"❌ Automated fix failed: {message}\n\nPlease review and fix manually."
                 )
             except Exception as e:
-                logger.warning(f"Could not add start comment to issue #{issue.number}: {e}")
-                logger.info("Continuing with issue processing despite comment failure")
-            
-            # Execute Claude Code to fix the issue
-            success, message = claude_executor.execute_issue_fix(
-                repo_url=Config.get_repo_url(),
-                issue_number=issue.number,
-                issue_title=issue.title,
-                issue_body=issue.body or ""
-            )
+                logger.warning(f"Could not add failure comment to issue #{issue.number}: {e}")
             
-            if success:
-                logger.info(f"Successfully processed issue #{issue.number}")
-                
-                # Try to add success comment and close issue (optional)
-                try:
-                    github_client.add_comment(
-                        issue.number,
-                        f"✅ Automated fix completed! {message}"
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not add success comment to issue #{issue.number}: {e}")
-                
-                try:
-                    github_client.close_issue(
-                        issue.number,
-                        "🤖 Issue automatically resolved by Claude Code automation."
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not close issue #{issue.number}: {e}")
-                    logger.info("Issue was processed successfully but remains open due to permissions")
-                
-                # Mark as processed only on success
-                issue_tracker.mark_processed(issue.number)
-                logger.info(f"Issue #{issue.number} marked as processed")
-                
-            else:
-                logger.error(f"Failed to process issue #{issue.number}: {message}")
-                
-                # Try to add failure comment (optional)
-                try:
-                    github_client.add_comment(
-                        issue.number,
-                        f"❌ Automated fix failed: {message}\n\nPlease review and fix manually."
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not add failure comment to issue #{issue.number}: {e}")
-                
-                # Mark as failed with exponential backoff
-                issue_tracker.mark_failed(issue.number)
-        
+            # Mark as failed with exponential backoff
+            issue_tracker.mark_failed(issue.number)
+    
     except Exception as e:
-        logger.error(f"Error in process_new_issues: {e}")
+        logger.error(f"Error processing issue #{issue.number}: {e}")
 
 def check_claude_authentication():
     """Check if Claude Code is authenticated using headless mode"""
     logger = logging.getLogger(__name__)
     
+    if is_claude_auth_cached():
+        logger.info("✅ Claude Code authentication verified recently, skipping check")
+        return True
+    
     try:
         # Test authentication by running a simple headless command
         result = subprocess.run([
-            'claude', '--print', 'Hello, this is an authentication test.',
+            CLAUDE_BIN, '--print', 'Hello, this is an authentication test.',
             '--output-format', 'json'
-        ], capture_output=True, text=True, timeout=30)
+        ], capture_output=True, timeout=30)
         
         if result.returncode == 0:
             logger.info("✅ Claude Code is authenticated and working in headless mode")
+            set_claude_auth_cached(True)
             return True
         else:
             # Check if it's an authentication error
-            error_output = result.stderr.lower()
-            if 'auth' in error_output or 'login' in error_output or 'unauthenticated' in error_output:
+            if is_auth_error(result.stderr):
+                set_claude_auth_cached(False)
                 logger.info("❌ Claude Code not authenticated, providing authentication instructions...")
                 
                 # Provide clear authentication instructions
@@ -160,7 +187,7 @@ def check_claude_authentication():
                 
                 return False
             else:
-                logger.error(f"❌ Claude Code error (not authentication): {result.stderr}")
+                logger.error(f"❌ Claude Code error (not authentication): {result.stderr.decode(errors='replace')}")
                 return False
                 
     except subprocess.TimeoutExpired:
@@ -177,19 +204,23 @@ def main():
     """Main application entry point"""
     try:
         # Validate configuration
-        Config.validate()
+        CONFIG.validate()
         
         # Setup logging
-        logger = setup_logging(Config.LOG_LEVEL, Config.LOG_FILE)
+        logger = setup_logging(CONFIG.LOG_LEVEL, CONFIG.LOG_FILE)
         logger.info("GitHub Issue Automator starting...")
         
         # Start health check server
         start_health_server()
         
+        # Let concurrent subprocess waits share the event loop's selector
+        if install_pidfd_child_watcher():
+            logger.debug("Using pidfd child watcher for subprocesses")
+        
         # Initialize repository manager
         logger.info("📁 Initializing repository manager...")
         global repo_manager
-        repo_manager = RepositoryManager(Config.get_repo_url(), Config.GITHUB_TOKEN)
+        repo_manager = RepositoryManager(CONFIG.REPO_URL, CONFIG.GITHUB_TOKEN, worktree_dir=CONFIG.WORKTREE_DIR)
         
         repo_init_success, repo_init_msg = repo_manager.initialize_repo()
         if not repo_init_success:
@@ -198,6 +229,23 @@ def main():
         
         logger.info(f"Repository initialized: {repo_init_msg}")
         
+        # Share one GitHub client (and its connection pool) across all polling cycles
+        global github_client
+        github_client = GitHubClient(
+            token=CONFIG.GITHUB_TOKEN,
+            repo_owner=CONFIG.REPO_OWNER,
+            repo_name=CONFIG.REPO_NAME
+        )
+        
+        # One executor for the process keeps its per-repository worktree limits across cycles
+        global claude_executor
+        claude_executor = ClaudeExecutor(
+            repo_manager,
+            github_client,
+            claude_timeout=CONFIG.CLAUDE_TIMEOUT_SECONDS,
+            max_worktrees_per_repo=CONFIG.MAX_WORKTREES_PER_REPO
+        )
+        
         # Check Claude Code authentication
         logger.info("🔐 Checking Claude Code authentication...")
         claude_authenticated = check_claude_authentication()
@@ -206,13 +254,13 @@ def main():
             logger.warning("⚠️  Claude Code not authenticated. Issue processing will fail until authenticated.")
             logger.info("💡 Check the logs above for authentication URL, or restart the service after authentication")
         
-        logger.info(f"Monitoring repo: {Config.REPO_OWNER}/{Config.REPO_NAME}")
-        logger.info(f"Target user: {Config.TARGET_USER}")
-        logger.info(f"Poll interval: {Config.POLL_INTERVAL_MINUTES} minutes")
+        logger.info(f"Monitoring repo: {CONFIG.REPO_OWNER}/{CONFIG.REPO_NAME}")
+        logger.info(f"Target user: {CONFIG.TARGET_USER}")
+        logger.info(f"Poll interval: {CONFIG.POLL_INTERVAL_MINUTES} minutes")
         logger.info(f"Currently tracking {issue_tracker.get_processed_count()} processed issues")
         
         # Schedule the job
-        schedule.every(Config.POLL_INTERVAL_MINUTES).minutes.do(process_new_issues)
+        schedule.every(CONFIG.POLL_INTERVAL_MINUTES).minutes.do(process_new_issues)
         
         # Schedule daily cleanup of old processed issues
         schedule.every().day.at("02:00").do(lambda: issue_tracker.cleanup_old_issues())
@@ -224,14 +272,22 @@ def main():
         # Start the scheduler
         logger.info("Starting scheduler...")
         while True:
+            # Sleep until the next job is due instead of waking up to check
+            idle_seconds = schedule.idle_seconds()
+            if idle_seconds is None:
+                break  # No jobs scheduled
+            time.sleep(max(0, idle_seconds))
             schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
             
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         raise
+    finally:
+        async_runner.close()
+        if github_client:
+            github_client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
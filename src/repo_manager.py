@@ -1,71 +1,137 @@
 import os
+import base64
 import subprocess
 import logging
 import shutil
+import threading
+import time
+import uuid
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Resolved once so each spawn execs git directly instead of trying every PATH entry.
+# None of the git calls use preexec_fn or switch users, so CPython spawns them with vfork().
+GIT_BIN = shutil.which('git') or 'git'
+
+# Issues prepared within this many seconds of a successful fetch reuse it instead of fetching again
+FETCH_REUSE_SECONDS = 30
+
 class RepositoryManager:
-    """Manage persistent repository for issue processing"""
+    """Manage persistent repository and per-issue worktrees for issue processing"""
     
-    def __init__(self, repo_url: str, github_token: str, repo_dir: str = "/app/repo"):
+    def __init__(self, repo_url: str, github_token: str, repo_dir: str = "/app/repo", worktree_dir: str = "/app/worktrees",
+                 cache_dir: str = "/app/cache"):
         self.repo_url = repo_url
         self.github_token = github_token
         self.repo_dir = Path(repo_dir)
-        self.current_branch = None
+        self._repo_path = str(self.repo_dir)
+        self.worktree_dir = Path(worktree_dir)
+        self._worktree_path = str(self.worktree_dir)
+        self.cache_dir = Path(cache_dir)
+        self._git_lock = threading.Lock()
+        self._last_fetch = None  # time.monotonic() of the last successful fetch of main
+        self._initialized = False  # Set once the repository is known to be usable
+        self._branch_bases: Dict[str, str] = {}  # fix branch -> commit its worktree was created from
+        
+        # Fail fast instead of hanging on an interactive credential prompt or a stalled transfer
+        # (under 1 KB/s for 30s), and multiplex each fetch or push over one HTTP/2 connection.
+        # The token travels as an auth header scoped to github.com, so it stays out of the
+        # remote URL, the repository config and git's argv.
+        credentials = base64.b64encode(f'x-access-token:{github_token}'.encode()).decode()
+        self.git_env = dict(
+            os.environ,
+            GIT_TERMINAL_PROMPT='0',
+            GIT_HTTP_LOW_SPEED_LIMIT='1000',
+            GIT_HTTP_LOW_SPEED_TIME='30',
+            GIT_CONFIG_COUNT='2',
+            GIT_CONFIG_KEY_0='http.version',
+            GIT_CONFIG_VALUE_0='HTTP/2',
+            GIT_CONFIG_KEY_1='http.https://github.com/.extraheader',
+            GIT_CONFIG_VALUE_1=f'AUTHORIZATION: basic {credentials}'
+        )
+        
+        # Tools run inside worktrees share package stores, so installs after the first are mostly offline
+        self.workspace_env = dict(
+            self.git_env,
+            NPM_CONFIG_CACHE=str(self.cache_dir / 'npm'),
+            NPM_CONFIG_PREFER_OFFLINE='true',
+            NPM_CONFIG_AUDIT='false',
+            NPM_CONFIG_FUND='false',
+            YARN_CACHE_FOLDER=str(self.cache_dir / 'yarn'),
+            PNPM_STORE_DIR=str(self.cache_dir / 'pnpm')
+        )
+    
+    def _run(self, argv: List[str], stdout=subprocess.DEVNULL, **kwargs) -> subprocess.CompletedProcess:
+        """Run a git command, discarding its output unless stdout is requested"""
+        # An absolute executable and close_fds=False (descriptors are already non-inheritable)
+        # let CPython start git with posix_spawn
+        result = subprocess.run(
+            argv,
+            stdout=stdout,
+            stderr=subprocess.PIPE,
+            env=self.git_env,
+            close_fds=False,
+            **kwargs
+        )
         
-        # Convert HTTPS URL to use token authentication
-        self.auth_repo_url = self._get_authenticated_url(repo_url, github_token)
+        # Most calls only check the exit status, so stderr is decoded only when it explains a failure
+        result.stderr = result.stderr.decode(errors='replace') if result.returncode else ''
+        return result
+    
+    def _git(self, *args: str, **kwargs) -> subprocess.CompletedProcess:
+        """Run git against the shared repository"""
+        # -C instead of cwd= keeps the spawn posix_spawn-eligible
+        return self._run([GIT_BIN, '-C', self._repo_path, *args], **kwargs)
     
-    def _get_authenticated_url(self, repo_url: str, token: str) -> str:
-        """Convert GitHub URL to use token authentication"""
-        if repo_url.startswith('https://github.com/'):
-            # Convert https://github.com/owner/repo.git to https://token@github.com/owner/repo.git
-            return repo_url.replace('https://github.com/', f'https://{token}@github.com/')
-        return repo_url
         
     def initialize_repo(self) -> Tuple[bool, str]:
         """Clone repository if not exists, or validate existing repo"""
         try:
-            if self.repo_dir.exists():
+            self._initialized = False
+            self._empty_trash()
+            
+            # A missing or empty directory (the image pre-creates it) just gets a fresh clone
+            if self.repo_dir.is_dir() and any(self.repo_dir.iterdir()):
                 # Check if it's a valid git repo
-                result = subprocess.run(
-                    ['git', 'rev-parse', '--git-dir'],
-                    cwd=self.repo_dir,
-                    capture_output=True,
-                    text=True
-                )
+                result = self._git('rev-parse', '--git-dir')
                 
                 if result.returncode == 0:
                     logger.info(f"Using existing repository at {self.repo_dir}")
+                    self._initialized = True
                     return self._update_repo()
-                else:
-                    logger.warning(f"Invalid git repo at {self.repo_dir}, removing and cloning fresh")
-                    shutil.rmtree(self.repo_dir)
+                
+                # Most breakage (a missing HEAD, a stale lock) can be fixed without downloading everything again
+                logger.warning(f"Invalid git repo at {self.repo_dir}, trying to repair it")
+                if (self.repo_dir / '.git').is_dir() and self._recover_repo():
+                    logger.info("Repository repaired in place")
+                    self._initialized = True
+                    return True, "Repository repaired"
+                
+                logger.warning(f"Could not repair {self.repo_dir}, removing and cloning fresh")
+                shutil.rmtree(self.repo_dir)
             
             # Clone fresh repository using authenticated URL
             logger.info(f"Cloning repository {self.repo_url} to {self.repo_dir}")
             self.repo_dir.parent.mkdir(parents=True, exist_ok=True)
             
-            result = subprocess.run(
-                ['git', 'clone', self.auth_repo_url, str(self.repo_dir)],
-                capture_output=True,
-                text=True,
+            # Only the tip of main is needed, so skip history, other branches, tags and unused blobs.
+            # Protocol v2 also lets the server advertise just the refs being asked for. Servers without
+            # filter support ignore --filter with a warning, so no capability probe is needed.
+            result = self._run(
+                [
+                    GIT_BIN, '-c', 'protocol.version=2', 'clone',
+                    '--filter=blob:none', '--depth=1', '--single-branch', '--branch=main', '--no-tags',
+                    self.repo_url, self._repo_path
+                ],
                 timeout=300
             )
             
             if result.returncode == 0:
                 logger.info("Repository cloned successfully")
-                
-                # Set remote URL to use authenticated URL for pushes
-                subprocess.run(
-                    ['git', 'remote', 'set-url', 'origin', self.auth_repo_url],
-                    cwd=self.repo_dir,
-                    capture_output=True
-                )
-                
+                self._last_fetch = time.monotonic()
+                self._initialized = True
                 return True, "Repository initialized"
             else:
                 logger.error(f"Failed to clone repository: {result.stderr}")
@@ -77,30 +143,57 @@ class RepositoryManager:
             logger.error(f"Error initializing repository: {e}")
             return False, str(e)
     
-    def _update_repo(self) -> Tuple[bool, str]:
-        """Fetch latest changes from remote"""
+    def _recover_repo(self) -> bool:
+        """Try to turn a broken clone back into a shallow clone of main without deleting it"""
         try:
-            # Ensure remote URL uses authentication
-            subprocess.run(
-                ['git', 'remote', 'set-url', 'origin', self.auth_repo_url],
-                cwd=self.repo_dir,
-                capture_output=True
+            # Left behind when a git process is killed mid-write; nothing else runs during initialization
+            (self.repo_dir / '.git' / 'index.lock').unlink(missing_ok=True)
+            
+            # Re-initializing restores missing repository files and keeps existing objects and config
+            if self._git('init', '--quiet').returncode != 0:
+                return False
+            self._git('symbolic-ref', 'HEAD', 'refs/heads/main')
+            
+            # Same single-branch, tagless tracking a fresh clone sets up
+            self._git('remote', 'add', '-t', 'main', '--no-tags', 'origin', self.repo_url)
+            self._git('remote', 'set-url', 'origin', self.repo_url)
+            
+            result = self._git(
+                '-c', 'protocol.version=2', 'fetch', '--depth=1', '--filter=blob:none', 'origin', 'main',
+                timeout=300
             )
+            if result.returncode != 0:
+                logger.warning(f"Fetch during repair failed: {result.stderr}")
+                return False
+            self._last_fetch = time.monotonic()
             
-            # Ensure we're on main branch
-            subprocess.run(['git', 'checkout', 'main'], cwd=self.repo_dir, check=True, capture_output=True)
+            result = self._git('reset', '--quiet', '--hard', 'FETCH_HEAD')
+            if result.returncode != 0:
+                logger.warning(f"Reset during repair failed: {result.stderr}")
+                return False
             
-            # Fetch latest changes
-            result = subprocess.run(
-                ['git', 'fetch', 'origin'],
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True,
+            return self._git('rev-parse', '--git-dir').returncode == 0
+        
+        except Exception as e:
+            logger.warning(f"Error repairing repository: {e}")
+            return False
+    
+    def _update_repo(self) -> Tuple[bool, str]:
+        """Fetch latest changes from remote"""
+        try:
+            # Clones from older versions have the token embedded in origin's URL
+            self._git('remote', 'set-url', 'origin', self.repo_url)
+            
+            # Fetch latest changes, keeping the clone shallow. Issues check out origin/main into their
+            # own worktrees, so the shared clone's HEAD and working tree are never touched.
+            result = self._git(
+                '-c', 'protocol.version=2', 'fetch', '--depth=1', '--filter=blob:none', 'origin', 'main',
                 timeout=60
             )
             
             if result.returncode == 0:
                 logger.info("Repository updated from remote")
+                self._last_fetch = time.monotonic()
                 return True, "Repository updated"
             else:
                 logger.warning(f"Failed to fetch from remote: {result.stderr}")
@@ -111,117 +204,135 @@ class RepositoryManager:
             return True, f"Using existing repository (update failed: {e})"
     
     def prepare_for_issue(self, issue_number: int) -> Tuple[bool, str]:
-        """Prepare repository for working on a specific issue"""
+        """Create a dedicated worktree on a fresh fix branch for a specific issue"""
         try:
             branch_name = f"fix-issue-{issue_number}"
+            worktree_path = self.get_worktree_directory(issue_number)
             
-            # Ensure we're in the repo directory
-            if not self.repo_dir.exists():
-                return False, "Repository not initialized"
-            
-            # Clean up any existing work
-            subprocess.run(['git', 'reset', '--hard'], cwd=self.repo_dir, capture_output=True)
-            subprocess.run(['git', 'clean', '-fd'], cwd=self.repo_dir, capture_output=True)
-            
-            # Switch to main branch
-            result = subprocess.run(
-                ['git', 'checkout', 'main'],
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                return False, f"Failed to checkout main: {result.stderr}"
-            
-            # Pull latest changes
-            result = subprocess.run(
-                ['git', 'pull', 'origin', 'main'],
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                logger.warning(f"Failed to pull latest changes: {result.stderr}")
-                # Continue anyway - maybe we're offline or have local changes
-            
-            # Delete branch if it exists
-            subprocess.run(
-                ['git', 'branch', '-D', branch_name],
-                cwd=self.repo_dir,
-                capture_output=True
-            )
-            
-            # Create and checkout new branch
-            result = subprocess.run(
-                ['git', 'checkout', '-b', branch_name],
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True
-            )
+            # Worktrees share the repository's refs and object store, so serialize changes to them
+            with self._git_lock:
+                # Fetch the latest main into the shared object store, once per burst of issues
+                if self._last_fetch is None or time.monotonic() - self._last_fetch > FETCH_REUSE_SECONDS:
+                    result = self._git('-c', 'protocol.version=2', 'fetch', '--depth=1', '--filter=blob:none', 'origin', 'main')
+                    
+                    if result.returncode == 0:
+                        self._last_fetch = time.monotonic()
+                    else:
+                        logger.warning(f"Failed to fetch latest changes: {result.stderr}")
+                        # Continue anyway - maybe we're offline
+                
+                # Pin the base commit; later fetches for other issues move origin/main while this one runs
+                result = self._git('rev-parse', '--verify', 'origin/main^{commit}', stdout=subprocess.PIPE)
+                if result.returncode != 0:
+                    return False, f"Failed to resolve origin/main: {result.stderr}"
+                base_commit = result.stdout.decode().strip()
+                
+                # Drop any worktree left behind by an interrupted run
+                self._discard_worktree(worktree_path)
+                
+                # Check out latest main into the worktree on a (re)created fix branch
+                self.worktree_dir.mkdir(parents=True, exist_ok=True)
+                result = self._git('worktree', 'add', '--no-track', '-B', branch_name, worktree_path, base_commit)
+                if result.returncode == 0:
+                    self._branch_bases[branch_name] = base_commit
             
             if result.returncode == 0:
-                self.current_branch = branch_name
-                logger.info(f"Created and switched to branch: {branch_name}")
+                logger.info(f"Created worktree {worktree_path} on branch: {branch_name}")
                 return True, f"Branch {branch_name} ready"
             else:
-                return False, f"Failed to create branch: {result.stderr}"
+                return False, f"Failed to create worktree: {result.stderr}"
                 
         except Exception as e:
             logger.error(f"Error preparing repository for issue #{issue_number}: {e}")
             return False, str(e)
     
-    def cleanup_after_issue(self, success: bool) -> Tuple[bool, str]:
-        """Clean up repository after processing an issue"""
+    def cleanup_after_issue(self, issue_number: int, success: bool) -> Tuple[bool, str]:
+        """Remove the issue's worktree after processing an issue"""
         try:
-            if not self.repo_dir.exists():
-                return True, "Repository not found"
-            
-            # Switch back to main
-            result = subprocess.run(
-                ['git', 'checkout', 'main'],
-                cwd=self.repo_dir,
-                capture_output=True,
-                text=True
-            )
-            
-            # If we had a current branch and the issue failed, delete the branch
-            if self.current_branch and not success:
-                subprocess.run(
-                    ['git', 'branch', '-D', self.current_branch],
-                    cwd=self.repo_dir,
-                    capture_output=True
-                )
-                logger.info(f"Deleted failed branch: {self.current_branch}")
+            branch_name = f"fix-issue-{issue_number}"
             
-            # Clean up any uncommitted changes
-            subprocess.run(['git', 'reset', '--hard'], cwd=self.repo_dir, capture_output=True)
-            subprocess.run(['git', 'clean', '-fd'], cwd=self.repo_dir, capture_output=True)
+            with self._git_lock:
+                self._branch_bases.pop(branch_name, None)
+                
+                # Remove the worktree along with any uncommitted changes. A pushed branch is kept, so its
+                # worktree entry can wait for the next prepare's prune; a failed branch can only be
+                # deleted once its entry is gone.
+                self._discard_worktree(self.get_worktree_directory(issue_number), prune=not success)
+                
+                # If the issue failed, delete the branch
+                if not success:
+                    self._git('branch', '-D', branch_name)
+                    logger.info(f"Deleted failed branch: {branch_name}")
             
-            self.current_branch = None
             return True, "Repository cleaned up"
             
         except Exception as e:
             logger.error(f"Error cleaning up repository: {e}")
             return False, str(e)
     
+    def _discard_worktree(self, worktree_path: str, prune: bool = True):
+        """Detach a worktree from the repository and delete its files in the background"""
+        trash_path = self.worktree_dir / '.trash' / uuid.uuid4().hex
+        trash_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        try:
+            # A rename is a single syscall; unlinking node_modules and friends is not
+            os.rename(worktree_path, trash_path)
+        except FileNotFoundError:
+            pass
+        else:
+            self._delete_in_background(trash_path)
+        
+        # Forget worktrees whose directories are gone so their branches can be reused
+        if prune:
+            self._git('worktree', 'prune')
+    
+    def count_new_commits(self, branch_name: str) -> int:
+        """Count commits on a branch since the commit its worktree was created from"""
+        with self._git_lock:
+            # origin/main may have moved to a shallow tip with no ancestry back to the branch's base
+            base_commit = self._branch_bases.get(branch_name, 'origin/main')
+            result = self._git('rev-list', '--count', f'{base_commit}..{branch_name}', stdout=subprocess.PIPE)
+        
+        return int(result.stdout) if result.returncode == 0 else 0
+    
+    def _empty_trash(self):
+        """Delete worktrees discarded by a previous run"""
+        try:
+            for entry in os.scandir(self.worktree_dir / '.trash'):
+                self._delete_in_background(Path(entry.path))
+        except FileNotFoundError:
+            pass
+    
+    def _delete_in_background(self, path: Path):
+        """Remove a directory tree without blocking the caller"""
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(path,),
+            kwargs={'ignore_errors': True},
+            name=f"rmtree-{path.name}",
+            daemon=True
+        ).start()
+    
+    def get_worktree_directory(self, issue_number: int) -> str:
+        """Get the worktree directory path for an issue"""
+        return os.path.join(self._worktree_path, f"issue-{issue_number}")
+    
     def get_repo_directory(self) -> str:
         """Get the repository directory path"""
-        return str(self.repo_dir)
+        return self._repo_path
     
     def is_initialized(self) -> bool:
         """Check if repository is properly initialized"""
+        # A usable repository stays usable until initialize_repo() runs again
+        if self._initialized:
+            return True
+        
         try:
             if not self.repo_dir.exists():
                 return False
             
-            result = subprocess.run(
-                ['git', 'rev-parse', '--git-dir'],
-                cwd=self.repo_dir,
-                capture_output=True
-            )
-            
-            return result.returncode == 0
+            self._initialized = self._git('rev-parse', '--git-dir').returncode == 0
+            return self._initialized
         except:
             return False
\ No newline at end of file
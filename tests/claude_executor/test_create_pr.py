@@ -0,0 +1,96 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import git
+from claude_executor import ClaudeExecutor
+
+class FakeGitHub:
+    """Records pull requests instead of opening them"""
+    
+    def __init__(self, result=(True, 'https://github.com/owner/repo/pull/1')):
+        self.result = result
+        self.pull_requests = []
+    
+    def create_pull_request(self, branch_name, title, body, base='main'):
+        self.pull_requests.append((branch_name, title, body))
+        return self.result
+
+@pytest.fixture
+def work_repo(tmp_path, remote_repo):
+    """A clone of the remote with an unpushed fix branch"""
+    remote, _ = remote_repo
+    work = tmp_path / 'work'
+    git('clone', '--quiet', f'file://{remote}', str(work))
+    git('checkout', '--quiet', '-b', 'fix-issue-1', cwd=work)
+    return work
+
+def commit_fix(work: Path):
+    (work / 'fix.txt').write_text('fix\n')
+    git('add', 'fix.txt', cwd=work)
+    git('commit', '--quiet', '-m', 'Fix issue 1', cwd=work)
+
+def create_pr(work: Path, github: FakeGitHub):
+    repo_manager = SimpleNamespace(
+        git_env=None,
+        count_new_commits=lambda branch_name: int(git('rev-list', '--count', f'origin/main..{branch_name}', cwd=work))
+    )
+    executor = ClaudeExecutor(repo_manager, github)
+    return asyncio.run(executor._create_pr(str(work), 'fix-issue-1', 1, 'Broken button'))
+
+def test_pr_is_created_once_the_branch_is_pushed(work_repo, remote_repo):
+    remote, _ = remote_repo
+    commit_fix(work_repo)
+    github = FakeGitHub()
+    
+    assert create_pr(work_repo, github) == (True, "Created PR: https://github.com/owner/repo/pull/1")
+    assert git('rev-parse', 'fix-issue-1', cwd=remote) == git('rev-parse', 'HEAD', cwd=work_repo)
+    branch_name, title, body = github.pull_requests[0]
+    assert (branch_name, title) == ('fix-issue-1', "Fix: Broken button (#1)")
+    assert "Closes #1" in body
+
+def test_branch_without_commits_is_not_pushed(work_repo, remote_repo):
+    remote, _ = remote_repo
+    github = FakeGitHub()
+    
+    success, message = create_pr(work_repo, github)
+    
+    assert not success
+    assert message.startswith("No commits found")
+    assert github.pull_requests == []
+    assert git('branch', '--list', 'fix-issue-1', cwd=remote) == ''
+
+def test_rejected_push_does_not_create_pr(work_repo, remote_repo):
+    remote, seed = remote_repo
+    # Someone else already pushed a different fix-issue-1, so the push is not a fast-forward
+    other = git('commit-tree', '-p', 'HEAD', '-m', 'Another fix', 'HEAD^{tree}', cwd=seed).strip()
+    git('push', '--quiet', str(remote), f'{other}:refs/heads/fix-issue-1', cwd=seed)
+    commit_fix(work_repo)
+    github = FakeGitHub()
+    
+    success, message = create_pr(work_repo, github)
+    
+    assert not success
+    assert message.startswith("Failed to push branch:")
+    assert github.pull_requests == []
+
+def test_failed_push_reports_git_error(work_repo, tmp_path):
+    commit_fix(work_repo)
+    git('remote', 'set-url', '--push', 'origin', str(tmp_path / 'missing.git'), cwd=work_repo)
+    github = FakeGitHub()
+    
+    success, message = create_pr(work_repo, github)
+    
+    assert not success
+    assert message.startswith("Failed to push branch:")
+    assert 'missing.git' in message
+    assert github.pull_requests == []
+
+def test_pr_api_failure_is_reported(work_repo):
+    commit_fix(work_repo)
+    
+    assert create_pr(work_repo, FakeGitHub(result=(False, 'Validation Failed'))) == (
+        False, "Failed to create PR: Validation Failed"
+    )
@@ -0,0 +1,32 @@
+import pytest
+
+import claude_executor
+from claude_executor import ClaudeExecutor, _compile_prompt, _FIX_PROMPT_TEMPLATE
+
+@pytest.fixture
+def executor():
+    return ClaudeExecutor(repo_manager=None, github_client=None)
+
+@pytest.mark.parametrize('title, body', [
+    ('Button misaligned', 'Steps:\n1. open page'),
+    ('Braces {issue_body} stay literal', 'const x = {a: 1}; // {{not a field}}'),
+    ('Ünïcödé title ✅', ''),
+])
+def test_prompt_matches_template_format(executor, title, body):
+    expected = _FIX_PROMPT_TEMPLATE.format(issue_number=42, issue_title=title, issue_body=body).encode()
+    
+    assert executor._build_fix_prompt(42, title, body) == expected
+
+def test_compile_prompt_splits_around_fields():
+    assert _compile_prompt('a {x} b {y}') == ((b'a ', b' b ', b''), ('x', 'y'))
+    assert _compile_prompt('{x}') == ((b'', b''), ('x',))
+    assert _compile_prompt('no fields') == ((b'no fields',), ())
+
+def test_compile_prompt_keeps_escaped_braces_in_place():
+    chunks, slots = _compile_prompt('a {{b}} {x} c')
+    
+    assert chunks == (b'a {b} ', b' c')
+    assert slots == ('x',)
+
+def test_template_compiles_to_one_chunk_per_gap():
+    assert len(claude_executor._PROMPT_CHUNKS) == len(claude_executor._PROMPT_SLOTS) + 1
@@ -0,0 +1,22 @@
+import pytest
+
+from claude_executor import _is_ref_pushed
+
+@pytest.mark.parametrize('line', [
+    b'*\trefs/heads/fix-issue-1:refs/heads/fix-issue-1\t[new branch]\n',
+    b' \trefs/heads/fix-issue-1:refs/heads/fix-issue-1\tabc123..def456\n',
+    b'+\trefs/heads/fix-issue-1:refs/heads/fix-issue-1\tabc123...def456 (forced update)\n',
+    b'=\trefs/heads/fix-issue-1:refs/heads/fix-issue-1\t[up to date]\n',
+])
+def test_accepted_refs_count_as_pushed(line):
+    assert _is_ref_pushed(line, 'fix-issue-1')
+
+@pytest.mark.parametrize('line', [
+    b'!\trefs/heads/fix-issue-1:refs/heads/fix-issue-1\t[rejected] (fetch first)\n',
+    b'*\trefs/heads/fix-issue-10:refs/heads/fix-issue-10\t[new branch]\n',
+    b'To https://github.com/owner/repo.git\n',
+    b'Done\n',
+    b'',
+])
+def test_other_lines_do_not_count_as_pushed(line):
+    assert not _is_ref_pushed(line, 'fix-issue-1')
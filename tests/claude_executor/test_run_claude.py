@@ -0,0 +1,76 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import claude_executor
+from claude_executor import ClaudeExecutor
+
+@pytest.fixture
+def fake_claude(tmp_path, monkeypatch):
+    """Install a shell script in place of the claude CLI"""
+    def install(script: str):
+        path = tmp_path / 'claude'
+        path.write_text('#!/bin/sh\n' + script)
+        path.chmod(0o755)
+        monkeypatch.setattr(claude_executor, 'CLAUDE_ARGV', (str(path),))
+    return install
+
+@pytest.fixture
+def auth_marker(tmp_path, monkeypatch):
+    marker = tmp_path / 'data' / '.claude_auth_ok'
+    monkeypatch.setattr(claude_executor, 'CLAUDE_AUTH_MARKER', marker)
+    return marker
+
+def run_claude(tmp_path, timeout=30):
+    executor = ClaudeExecutor(SimpleNamespace(workspace_env=None), github_client=None, claude_timeout=timeout)
+    return asyncio.run(executor._run_claude_code(str(tmp_path), b'fix issue #1'))
+
+def is_running(pid: int) -> bool:
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().split(') ', 1)[1][0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def test_result_event_and_cost_are_read_from_stream(tmp_path, fake_claude):
+    fake_claude(
+        'grep -q "issue #1" || exit 2\n'
+        'echo \'{"type":"system","subtype":"init"}\'\n'
+        'echo "not json"\n'
+        'echo \'{"type":"result","result":"done","total_cost_usd":0.12}\'\n'
+    )
+    
+    result = run_claude(tmp_path)
+    
+    assert result.success
+    assert result.cost == 0.12
+
+def test_failure_reports_stderr(tmp_path, fake_claude, auth_marker):
+    fake_claude('cat > /dev/null\necho "boom" >&2\nexit 1\n')
+    
+    result = run_claude(tmp_path)
+    
+    assert not result.success
+    assert 'boom' in result.message
+
+def test_auth_failure_clears_auth_marker(tmp_path, fake_claude, auth_marker):
+    claude_executor.set_claude_auth_cached(True)
+    assert claude_executor.is_claude_auth_cached()
+    fake_claude('cat > /dev/null\necho "Invalid API key. Please run /login" >&2\nexit 1\n')
+    
+    assert not run_claude(tmp_path).success
+    assert not auth_marker.exists()
+
+def test_timeout_kills_the_whole_process_group(tmp_path, fake_claude):
+    # The background child keeps Claude's stdout open after Claude itself is killed
+    fake_claude(f'cat > /dev/null\nsleep 30 &\necho $! > {tmp_path}/child.pid\nsleep 30\n')
+    
+    started = time.monotonic()
+    result = run_claude(tmp_path, timeout=1)
+    
+    assert not result.success
+    assert 'timed out' in result.message
+    assert time.monotonic() - started < 10
+    assert not is_running(int((tmp_path / 'child.pid').read_text()))
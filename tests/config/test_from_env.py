@@ -0,0 +1,50 @@
+import dataclasses
+
+import pytest
+
+from config import Config
+
+OPTIONAL_VARS = (
+    'POLL_INTERVAL_MINUTES', 'MAX_CONCURRENT_ISSUES', 'MAX_WORKTREES_PER_REPO', 'CLAUDE_TIMEOUT_SECONDS',
+    'LOG_LEVEL', 'LOG_FILE'
+)
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+    monkeypatch.setenv('REPO_OWNER', 'owner')
+    monkeypatch.setenv('REPO_NAME', 'repo')
+    monkeypatch.setenv('TARGET_USER', 'alice')
+    for var in OPTIONAL_VARS:
+        monkeypatch.delenv(var, raising=False)
+    return monkeypatch
+
+def test_reads_environment_with_defaults(env):
+    env.setenv('CLAUDE_TIMEOUT_SECONDS', '60')
+    
+    config = Config.from_env()
+    
+    assert (config.GITHUB_TOKEN, config.REPO_OWNER, config.REPO_NAME, config.TARGET_USER) == ('token', 'owner', 'repo', 'alice')
+    assert config.CLAUDE_TIMEOUT_SECONDS == 60
+    assert config.POLL_INTERVAL_MINUTES == 5
+    assert config.LOG_LEVEL == 'INFO'
+    assert config.validate()
+
+def test_repo_url_is_derived_once(env):
+    config = Config.from_env()
+    
+    assert config.REPO_URL == "https://github.com/owner/repo.git"
+    assert config.get_repo_url() == config.REPO_URL
+
+def test_config_is_immutable(env):
+    config = Config.from_env()
+    
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        config.REPO_NAME = 'other'
+
+def test_validate_names_missing_variables(env):
+    env.delenv('GITHUB_TOKEN')
+    env.setenv('TARGET_USER', '')
+    
+    with pytest.raises(ValueError, match="GITHUB_TOKEN, TARGET_USER"):
+        Config.from_env().validate()
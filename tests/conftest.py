@@ -0,0 +1,45 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Modules in src/ import each other by bare name, as they do when run with `python src/main.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+def git(*args: str, cwd: Path = None) -> str:
+    """Run git for test setup and return its stdout"""
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+@pytest.fixture
+def git_identity(monkeypatch):
+    """Give commits made during a test an author without touching the user's git config"""
+    for var in ('GIT_AUTHOR_NAME', 'GIT_COMMITTER_NAME'):
+        monkeypatch.setenv(var, 'Test')
+    for var in ('GIT_AUTHOR_EMAIL', 'GIT_COMMITTER_EMAIL'):
+        monkeypatch.setenv(var, 'test@example.com')
+
+@pytest.fixture
+def remote_repo(tmp_path, git_identity):
+    """A bare repository with a few commits on main, reachable through a file:// URL"""
+    remote = tmp_path / 'remote.git'
+    git('init', '--quiet', '--bare', '--initial-branch=main', str(remote))
+    git('config', 'uploadpack.allowfilter', 'true', cwd=remote)
+    git('config', 'uploadpack.allowanysha1inwant', 'true', cwd=remote)
+    
+    seed = tmp_path / 'seed'
+    git('init', '--quiet', '--initial-branch=main', str(seed))
+    for i in range(3):
+        (seed / f'file{i}.txt').write_text(f'{i}\n')
+        git('add', '.', cwd=seed)
+        git('commit', '--quiet', '-m', f'commit {i}', cwd=seed)
+    git('push', '--quiet', str(remote), 'main', cwd=seed)
+    
+    return remote, seed
+
+def push_new_commit(seed: Path, remote: Path, name: str):
+    """Advance the remote's main by one commit"""
+    (seed / name).write_text(f'{name}\n')
+    git('add', '.', cwd=seed)
+    git('commit', '--quiet', '-m', f'add {name}', cwd=seed)
+    git('push', '--quiet', str(remote), 'main', cwd=seed)
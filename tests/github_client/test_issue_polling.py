@@ -0,0 +1,142 @@
+from unittest.mock import Mock
+
+import pytest
+
+import github_client
+from github_client import GitHubClient
+
+class FakeResponse:
+    def __init__(self, status_code=200, payload=None, etag=None):
+        self.status_code = status_code
+        self.headers = {'ETag': etag} if etag else {}
+        self._payload = payload
+    
+    def json(self):
+        return self._payload
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class FakeSession:
+    """Answers the ETag probe and the GraphQL query from queued responses, recording each request"""
+    
+    def __init__(self):
+        self.headers = {}
+        self.probe_responses = []
+        self.query_responses = []
+        self.probes = []
+        self.queries = []
+    
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.probes.append(headers)
+        return self.probe_responses.pop(0)
+    
+    def post(self, url, json=None, timeout=None):
+        self.queries.append(json['variables'])
+        return self.query_responses.pop(0)
+
+def issue_node(number, state='OPEN'):
+    return {
+        'number': number,
+        'title': f'Issue {number}',
+        'body': None,
+        'state': state,
+        'createdAt': '2024-01-01T00:00:00Z',
+        'author': {'login': 'alice'}
+    }
+
+def graphql(*nodes):
+    return FakeResponse(payload={'data': {'repository': {'issues': {'nodes': list(nodes)}}}})
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(github_client, '_connect', lambda token, full_name, pool_size: (Mock(), Mock()))
+    monkeypatch.setattr(github_client, '_open_session', lambda token, pool_size: session)
+    return session
+
+@pytest.fixture
+def client(session):
+    return GitHubClient('token', 'owner', 'repo')
+
+def numbers(issues):
+    return [issue.number for issue in issues]
+
+def test_first_poll_queries_open_issues(client, session):
+    session.probe_responses.append(FakeResponse(etag='"e1"'))
+    session.query_responses.append(graphql(issue_node(3), issue_node(2)))
+    
+    issues = client.get_unprocessed_issues_by_user('alice', processed_issues={2}, limit=10)
+    
+    assert numbers(issues) == [3]
+    assert issues[0].body == ''
+    assert issues[0].author == 'alice'
+    assert session.probes == [None]
+    assert session.queries[0]['limit'] == 10
+    assert session.queries[0]['states'] == ['OPEN']
+    assert session.queries[0]['since'] is None
+
+def test_unchanged_probe_reuses_cached_issues(client, session):
+    session.probe_responses += [FakeResponse(etag='"e1"'), FakeResponse(status_code=304)]
+    session.query_responses.append(graphql(issue_node(3), issue_node(2)))
+    
+    client.get_unprocessed_issues_by_user('alice', processed_issues=set())
+    issues = client.get_unprocessed_issues_by_user('alice', processed_issues={3})
+    
+    assert numbers(issues) == [2]
+    assert session.probes[1] == {'If-None-Match': '"e1"'}
+    assert len(session.queries) == 1
+
+def test_changed_probe_merges_issues_updated_since_last_poll(client, session, monkeypatch):
+    monkeypatch.setattr(github_client.time, 'time', lambda: 10_000.0)
+    session.probe_responses += [FakeResponse(etag='"e1"'), FakeResponse(etag='"e2"')]
+    session.query_responses += [
+        graphql(issue_node(3), issue_node(2)),
+        graphql(issue_node(5), issue_node(2, state='CLOSED'))
+    ]
+    
+    client.get_unprocessed_issues_by_user('alice', processed_issues=set())
+    issues = client.get_unprocessed_issues_by_user('alice', processed_issues=set())
+    
+    assert numbers(issues) == [5, 3]
+    assert session.queries[1]['states'] == ['OPEN', 'CLOSED']
+    # Reaches back POLL_OVERLAP_SECONDS before the previous query
+    assert session.queries[1]['since'] == '1970-01-01T02:45:40Z'
+
+def test_merge_keeps_newest_issues_up_to_limit(client, session):
+    session.probe_responses += [FakeResponse(etag='"e1"'), FakeResponse(etag='"e2"')]
+    session.query_responses += [graphql(issue_node(3), issue_node(2)), graphql(issue_node(4))]
+    
+    client.get_unprocessed_issues_by_user('alice', processed_issues=set(), limit=2)
+    issues = client.get_unprocessed_issues_by_user('alice', processed_issues=set(), limit=2)
+    
+    assert numbers(issues) == [4, 3]
+
+def test_closing_issues_in_a_full_cache_queries_again(client, session):
+    session.probe_responses += [FakeResponse(etag='"e1"'), FakeResponse(etag='"e2"')]
+    session.query_responses += [
+        graphql(issue_node(5), issue_node(4), issue_node(3)),
+        graphql(*(issue_node(number, state='CLOSED') for number in (5, 4, 3))),
+        graphql(issue_node(2), issue_node(1))
+    ]
+    
+    client.get_unprocessed_issues_by_user('alice', processed_issues=set(), limit=3)
+    issues = client.get_unprocessed_issues_by_user('alice', processed_issues=set(), limit=3)
+    
+    # Issues beyond the limit were never cached, so only a full query can bring them in
+    assert numbers(issues) == [2, 1]
+    assert session.queries[2]['states'] == ['OPEN']
+    assert session.queries[2]['since'] is None
+
+def test_errors_return_no_issues(client, session):
+    session.probe_responses.append(FakeResponse(etag='"e1"'))
+    session.query_responses.append(FakeResponse(payload={'errors': [{'message': 'bad query'}]}))
+    
+    assert client.get_unprocessed_issues_by_user('alice', processed_issues=set()) == []
+
+def test_failed_probe_returns_no_issues(client, session):
+    session.probe_responses.append(FakeResponse(status_code=502))
+    
+    assert client.get_unprocessed_issues_by_user('alice', processed_issues=set()) == []
+    assert session.queries == []
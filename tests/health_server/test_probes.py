@@ -0,0 +1,38 @@
+import http.client
+import socket
+
+import pytest
+
+from health_server import start_health_server
+
+@pytest.fixture
+def port(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        free_port = probe.getsockname()[1]
+    monkeypatch.setenv('PORT', str(free_port))
+    
+    server = start_health_server()
+    assert server is not None
+    yield free_port
+    server.close()
+
+def get(port: int, path: str):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('path', ['/', '/health'])
+def test_health_paths_answer_ok(port, path):
+    assert get(port, path) == (200, b'GitHub Issue Automator is running')
+
+def test_other_paths_are_not_found(port):
+    assert get(port, '/metrics') == (404, b'')
+
+def test_probes_are_answered_one_after_another(port):
+    for _ in range(3):
+        assert get(port, '/health')[0] == 200
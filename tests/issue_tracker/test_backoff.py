@@ -0,0 +1,38 @@
+from issue_tracker import IssueTracker
+
+def test_backoff_grows_and_caps(tmp_path):
+    tracker = IssueTracker(str(tmp_path / 'processed_issues.json'))
+    
+    backoffs = []
+    for _ in range(7):
+        tracker.mark_failed(1, current_time=1000.0)
+        backoffs.append(tracker.failed_attempts[1]['backoff_minutes'])
+    
+    assert backoffs == [5, 15, 45, 135, 405, 1215, 1440]
+    assert tracker.failed_attempts[1]['count'] == 7
+    assert tracker.failed_attempts[1]['next_retry'] == 1000.0 + 1440 * 60
+
+def test_retry_waits_for_backoff(tmp_path):
+    tracker = IssueTracker(str(tmp_path / 'processed_issues.json'))
+    tracker.mark_failed(1, current_time=1000.0)
+    
+    assert not tracker.should_retry_issue(1, current_time=1299.0)
+    assert tracker.should_retry_issue(1, current_time=1300.0)
+    assert tracker.should_retry_issue(2, current_time=1000.0)
+    
+    tracker.mark_processed(1)
+    assert not tracker.should_retry_issue(1, current_time=5000.0)
+
+def test_eligible_filter_matches_should_retry(tmp_path):
+    tracker = IssueTracker(str(tmp_path / 'processed_issues.json'))
+    tracker.mark_processed(1)
+    tracker.mark_failed(2, current_time=1000.0)
+    tracker.mark_failed(3, current_time=0.0)
+    
+    processed, not_ready = tracker.build_eligible_filter(current_time=1000.0)
+    
+    assert processed == {1}
+    assert not_ready == {2}
+    for issue_number in (1, 2, 3, 4):
+        eligible = issue_number not in processed and issue_number not in not_ready
+        assert eligible == tracker.should_retry_issue(issue_number, current_time=1000.0)
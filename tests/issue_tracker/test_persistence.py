@@ -0,0 +1,164 @@
+import json
+import threading
+
+import pytest
+
+import issue_tracker
+from issue_tracker import IssueTracker
+
+@pytest.fixture
+def storage_path(tmp_path):
+    return tmp_path / 'data' / 'processed_issues.json'
+
+def reload(storage_path) -> IssueTracker:
+    return IssueTracker(str(storage_path))
+
+class Gate:
+    """Stands in for a flush event and blocks the writer thread until released"""
+    
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+    
+    def set(self):
+        self.entered.set()
+        self.release.wait(5)
+
+def hold_writer(tracker: IssueTracker) -> Gate:
+    """Park the writer thread so the writes queued next are handled in one pass"""
+    gate = Gate()
+    tracker._write_queue.put((issue_tracker._WRITE_FLUSH, gate))
+    assert gate.entered.wait(5)
+    return gate
+
+def test_marks_survive_reload_through_log(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    tracker.mark_processed(1)
+    tracker.mark_failed(2, current_time=1000.0)
+    tracker.flush()
+    
+    assert not storage_path.exists()  # Nothing compacted yet, everything is in the log
+    
+    loaded = reload(storage_path)
+    assert loaded.processed_issues == {1}
+    assert loaded.failed_attempts == {
+        2: {'count': 1, 'last_attempt': 1000.0, 'next_retry': 1300.0, 'backoff_minutes': 5}
+    }
+
+def test_marking_processed_clears_earlier_failure_on_replay(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    tracker.mark_failed(3, current_time=1000.0)
+    tracker.mark_processed(3)
+    tracker.flush()
+    
+    loaded = reload(storage_path)
+    assert loaded.processed_issues == {3}
+    assert loaded.failed_attempts == {}
+
+def test_snapshot_keeps_int_keys(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    tracker.mark_failed(7, current_time=1000.0)
+    tracker.cleanup_old_issues()
+    tracker.flush()
+    
+    assert json.loads(storage_path.read_text())['failed_attempts'][0][0] == 7
+    assert list(reload(storage_path).failed_attempts) == [7]
+
+def test_loads_snapshot_with_string_keyed_failures(storage_path):
+    storage_path.parent.mkdir(parents=True)
+    storage_path.write_text(json.dumps({
+        'processed_issues': [1, 2],
+        'failed_attempts': {'5': {'count': 1, 'next_retry': 0}}
+    }))
+    
+    loaded = reload(storage_path)
+    assert loaded.processed_issues == {1, 2}
+    assert loaded.failed_attempts == {5: {'count': 1, 'next_retry': 0}}
+
+def test_compaction_folds_log_into_snapshot(storage_path):
+    tracker = IssueTracker(str(storage_path), compact_after=3)
+    for issue_number in (1, 2, 3):
+        tracker.mark_processed(issue_number)
+    tracker.flush()
+    
+    assert set(json.loads(storage_path.read_text())['processed_issues']) == {1, 2, 3}
+    assert tracker.log_path.read_bytes() == b''
+    assert reload(storage_path).processed_issues == {1, 2, 3}
+
+def test_cleanup_keeps_newest_issues(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    for issue_number in range(1, 11):
+        tracker.mark_processed(issue_number)
+    tracker.cleanup_old_issues(keep_last=3)
+    tracker.flush()
+    
+    assert tracker.processed_issues == {8, 9, 10}
+    assert reload(storage_path).processed_issues == {8, 9, 10}
+
+def test_torn_last_log_record_is_dropped(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    tracker.mark_processed(5)
+    tracker.cleanup_old_issues()
+    tracker.mark_processed(6)
+    tracker.flush()
+    intact_log = tracker.log_path.read_bytes()
+    with open(tracker.log_path, 'ab') as f:
+        f.write(b'{"op":"p","n":1')
+    
+    loaded = reload(storage_path)
+    assert loaded.processed_issues == {5, 6}
+    assert tracker.log_path.read_bytes() == intact_log
+    
+    # New records start on a clean line again
+    loaded.mark_processed(7)
+    loaded.flush()
+    assert reload(storage_path).processed_issues == {5, 6, 7}
+
+def test_unreadable_middle_log_record_is_skipped(storage_path):
+    tracker = IssueTracker(str(storage_path))
+    tracker.mark_processed(1)
+    tracker.flush()
+    with open(tracker.log_path, 'ab') as f:
+        f.write(b'garbage\n{"op":"p","n":2}')
+    
+    assert reload(storage_path).processed_issues == {1, 2}
+    assert tracker.log_path.read_bytes().endswith(b'{"op":"p","n":2}\n')
+
+def test_writer_coalesces_queued_snapshots(storage_path, monkeypatch):
+    tracker = IssueTracker(str(storage_path))
+    
+    replaced = []
+    original_replace = issue_tracker.os.replace
+    def counting_replace(src, dst):
+        replaced.append(dst)
+        original_replace(src, dst)
+    monkeypatch.setattr(issue_tracker.os, 'replace', counting_replace)
+    
+    # Several snapshots queue up behind the held writer
+    gate = hold_writer(tracker)
+    for issue_number in (1, 2, 3):
+        tracker.mark_processed(issue_number)
+        tracker.cleanup_old_issues()
+    tracker.mark_processed(4)
+    gate.release.set()
+    tracker.flush()
+    
+    assert len(replaced) == 1
+    assert set(json.loads(storage_path.read_text())['processed_issues']) == {1, 2, 3}
+    assert reload(storage_path).processed_issues == {1, 2, 3, 4}
+
+def test_failed_snapshot_keeps_log_records(storage_path, monkeypatch):
+    tracker = IssueTracker(str(storage_path))
+    def failing_replace(src, dst):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(issue_tracker.os, 'replace', failing_replace)
+    
+    gate = hold_writer(tracker)
+    tracker.mark_processed(1)
+    tracker.cleanup_old_issues()
+    tracker.mark_processed(2)
+    gate.release.set()
+    tracker.flush()
+    
+    assert not storage_path.exists()
+    assert reload(storage_path).processed_issues == {1, 2}
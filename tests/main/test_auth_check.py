@@ -0,0 +1,44 @@
+import importlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import claude_executor
+
+@pytest.fixture
+def main_module(tmp_path, monkeypatch):
+    # Importing main creates its module-level tracker under data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('main')
+
+@pytest.fixture
+def auth_marker(tmp_path, monkeypatch):
+    marker = tmp_path / 'data' / '.claude_auth_ok'
+    monkeypatch.setattr(claude_executor, 'CLAUDE_AUTH_MARKER', marker)
+    return marker
+
+@pytest.fixture
+def probes(main_module, monkeypatch):
+    """Record Claude CLI probes, each of which succeeds"""
+    calls = []
+    def fake_run(argv, **kwargs):
+        calls.append(argv)
+        return SimpleNamespace(returncode=0, stderr=b'')
+    monkeypatch.setattr(main_module.subprocess, 'run', fake_run)
+    return calls
+
+def test_fresh_marker_skips_the_cli_probe(main_module, auth_marker, probes):
+    claude_executor.set_claude_auth_cached(True)
+    
+    assert main_module.check_claude_authentication()
+    assert probes == []
+
+def test_stale_marker_probes_and_refreshes_it(main_module, auth_marker, probes):
+    claude_executor.set_claude_auth_cached(True)
+    stale = auth_marker.stat().st_mtime - claude_executor.CLAUDE_AUTH_MARKER_TTL_SECONDS - 1
+    os.utime(auth_marker, (stale, stale))
+    
+    assert main_module.check_claude_authentication()
+    assert len(probes) == 1
+    assert claude_executor.is_claude_auth_cached()
@@ -0,0 +1,82 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from issue_tracker import IssueTracker
+
+@pytest.fixture
+def main_module(tmp_path, monkeypatch):
+    # Importing main creates its module-level tracker under data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    main = importlib.import_module('main')
+    monkeypatch.setattr(main, 'issue_tracker', IssueTracker(str(tmp_path / 'tracker' / 'processed_issues.json')))
+    return main
+
+class FakeGitHub:
+    """Records comment and close calls in order; both succeed unless told otherwise"""
+    
+    def __init__(self, close_succeeds=True):
+        self.calls = []
+        self.close_succeeds = close_succeeds
+    
+    def add_comment(self, issue_number, comment):
+        self.calls.append(('comment', issue_number, comment))
+        return True
+    
+    def close_issue(self, issue_number, comment=None):
+        self.calls.append(('close', issue_number, comment))
+        return self.close_succeeds
+
+class FakeExecutor:
+    def __init__(self, success, message):
+        self.result = (success, message)
+    
+    async def execute_issue_fix(self, repo_url, issue_number, issue_title, issue_body):
+        return self.result
+
+def issue(number):
+    return SimpleNamespace(number=number, title=f'Issue {number}', body='details')
+
+def test_failed_fix_records_backoff(main_module):
+    github = FakeGitHub()
+    
+    asyncio.run(main_module.process_issue(github, FakeExecutor(False, "Claude Code execution timed out"), issue(9)))
+    
+    tracker = main_module.issue_tracker
+    assert tracker.failed_attempts[9]['count'] == 1
+    assert tracker.failed_attempts[9]['backoff_minutes'] == 5
+    assert not tracker.should_retry_issue(9)
+    assert 9 not in tracker.processed_issues
+    assert [call[0] for call in github.calls] == ['comment', 'comment']
+    assert 'timed out' in github.calls[-1][2]
+
+def test_repeated_failures_extend_backoff(main_module):
+    executor = FakeExecutor(False, "boom")
+    
+    for _ in range(3):
+        asyncio.run(main_module.process_issue(FakeGitHub(), executor, issue(9)))
+    
+    assert main_module.issue_tracker.failed_attempts[9]['count'] == 3
+    assert main_module.issue_tracker.failed_attempts[9]['backoff_minutes'] == 45
+
+def test_successful_fix_comments_and_closes(main_module):
+    github = FakeGitHub()
+    
+    asyncio.run(main_module.process_issue(github, FakeExecutor(True, "Created PR: url"), issue(4)))
+    
+    # The success comment and the close run concurrently, so only the start comment has a fixed place
+    assert github.calls[0][0] == 'comment'
+    assert sorted(call[0] for call in github.calls[1:]) == ['close', 'comment']
+    success_comment = next(call[2] for call in github.calls[1:] if call[0] == 'comment')
+    assert 'Created PR: url' in success_comment
+    assert 'automatically resolved' in success_comment
+    assert ('close', 4, None) in github.calls
+    assert main_module.issue_tracker.is_processed(4)
+
+def test_issue_is_processed_even_if_it_cannot_be_closed(main_module):
+    asyncio.run(main_module.process_issue(FakeGitHub(close_succeeds=False), FakeExecutor(True, "ok"), issue(4)))
+    
+    assert main_module.issue_tracker.is_processed(4)
+    assert 4 not in main_module.issue_tracker.failed_attempts
@@ -0,0 +1,155 @@
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import git, push_new_commit
+from repo_manager import RepositoryManager
+
+@pytest.fixture
+def manager(tmp_path, remote_repo):
+    remote, _ = remote_repo
+    return RepositoryManager(
+        f'file://{remote}',
+        'token',
+        repo_dir=str(tmp_path / 'repo'),
+        worktree_dir=str(tmp_path / 'worktrees')
+    )
+
+@pytest.fixture
+def initialized(manager):
+    success, message = manager.initialize_repo()
+    assert success, message
+    return manager
+
+def wait_until_gone(path: Path, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return not path.exists()
+
+def commit_in(worktree: str, name: str):
+    Path(worktree, name).write_text('fix\n')
+    git('add', name, cwd=worktree)
+    git('commit', '--quiet', '-m', f'fix {name}', cwd=worktree)
+
+def test_clones_into_empty_precreated_directory(manager):
+    manager.repo_dir.mkdir()
+    
+    assert manager.initialize_repo() == (True, "Repository initialized")
+    assert manager.is_initialized()
+    assert git('config', '--get-all', 'remote.origin.fetch', cwd=manager.repo_dir).split() == [
+        '+refs/heads/main:refs/remotes/origin/main'
+    ]
+    assert git('rev-parse', '--is-shallow-repository', cwd=manager.repo_dir).strip() == 'true'
+
+def test_reinitializing_existing_clone_fetches(initialized):
+    manager = RepositoryManager(
+        initialized.repo_url, 'token', repo_dir=str(initialized.repo_dir), worktree_dir=str(initialized.worktree_dir)
+    )
+    
+    assert manager.initialize_repo() == (True, "Repository updated")
+
+def test_prepare_creates_worktree_on_fix_branch(initialized):
+    success, message = initialized.prepare_for_issue(7)
+    
+    assert success, message
+    worktree = initialized.get_worktree_directory(7)
+    assert git('rev-parse', '--abbrev-ref', 'HEAD', cwd=worktree).strip() == 'fix-issue-7'
+    assert Path(worktree, 'file0.txt').read_text() == '0\n'
+    assert initialized.count_new_commits('fix-issue-7') == 0
+
+def test_prepare_replaces_leftover_worktree(initialized):
+    initialized.prepare_for_issue(7)
+    commit_in(initialized.get_worktree_directory(7), 'stale.txt')
+    
+    success, message = initialized.prepare_for_issue(7)
+    
+    assert success, message
+    assert not Path(initialized.get_worktree_directory(7), 'stale.txt').exists()
+    assert initialized.count_new_commits('fix-issue-7') == 0
+
+def test_commit_count_ignores_main_moving_underneath(initialized, remote_repo):
+    remote, seed = remote_repo
+    initialized.prepare_for_issue(1)
+    
+    # Another issue's prepare fetches a new, shallow tip of main
+    push_new_commit(seed, remote, 'upstream.txt')
+    initialized._last_fetch = None
+    initialized.prepare_for_issue(2)
+    
+    assert initialized.count_new_commits('fix-issue-1') == 0
+    commit_in(initialized.get_worktree_directory(1), 'fix.txt')
+    assert initialized.count_new_commits('fix-issue-1') == 1
+
+def test_cleanup_after_failure_deletes_worktree_and_branch(initialized):
+    initialized.prepare_for_issue(3)
+    worktree = initialized.get_worktree_directory(3)
+    
+    assert initialized.cleanup_after_issue(3, success=False) == (True, "Repository cleaned up")
+    assert not os.path.exists(worktree)
+    assert git('branch', '--list', 'fix-issue-3', cwd=initialized.repo_dir) == ''
+    assert worktree not in git('worktree', 'list', cwd=initialized.repo_dir)
+
+def test_discarded_worktree_is_deleted_in_background(initialized):
+    initialized.prepare_for_issue(3)
+    initialized.cleanup_after_issue(3, success=False)
+    
+    trash = initialized.worktree_dir / '.trash'
+    assert all(wait_until_gone(entry) for entry in trash.iterdir())
+
+def test_initialize_empties_trash_left_by_previous_run(initialized):
+    leftover = initialized.worktree_dir / '.trash' / 'leftover'
+    (leftover / 'node_modules').mkdir(parents=True)
+    
+    initialized.initialize_repo()
+    
+    assert wait_until_gone(leftover)
+
+def test_cleanup_after_success_keeps_branch(initialized):
+    initialized.prepare_for_issue(4)
+    commit_in(initialized.get_worktree_directory(4), 'fix.txt')
+    
+    initialized.cleanup_after_issue(4, success=True)
+    
+    assert not os.path.exists(initialized.get_worktree_directory(4))
+    assert 'fix-issue-4' in git('branch', '--list', 'fix-issue-4', cwd=initialized.repo_dir)
+    
+    # The kept branch's stale worktree entry does not block preparing the issue again
+    assert initialized.prepare_for_issue(4)[0]
+
+def test_missing_head_is_repaired_in_place(initialized):
+    (initialized.repo_dir / '.git' / 'HEAD').unlink()
+    (initialized.repo_dir / '.git' / 'index.lock').touch()
+    marker = initialized.repo_dir / 'untracked.txt'
+    marker.write_text('kept\n')
+    
+    assert initialized.initialize_repo() == (True, "Repository repaired")
+    assert marker.exists()
+    assert git('rev-parse', '--abbrev-ref', 'HEAD', cwd=initialized.repo_dir).strip() == 'main'
+    assert initialized.prepare_for_issue(5)[0]
+
+def test_lost_objects_are_refetched_during_repair(initialized):
+    shutil.rmtree(initialized.repo_dir / '.git' / 'objects')
+    
+    assert initialized.initialize_repo() == (True, "Repository repaired")
+    assert initialized.prepare_for_issue(6)[0]
+
+def test_directory_without_git_is_cloned_fresh(manager):
+    manager.repo_dir.mkdir()
+    (manager.repo_dir / 'junk.txt').write_text('junk\n')
+    
+    assert manager.initialize_repo() == (True, "Repository initialized")
+    assert not (manager.repo_dir / 'junk.txt').exists()
+
+def test_clone_failure_is_reported(tmp_path):
+    manager = RepositoryManager(
+        f'file://{tmp_path}/missing.git', 'token', repo_dir=str(tmp_path / 'repo'), worktree_dir=str(tmp_path / 'worktrees')
+    )
+    
+    success, message = manager.initialize_repo()
+    
+    assert not success
+    assert message.startswith("Clone failed:")